@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Profile, Follow
+from core.admin import LargeTableAdminMixin
+from .models import User, Profile, Follow, OutboxEmail, UserToken, FollowSuggestion
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     list_display = ['email', 'username', 'is_verified', 'role', 'is_active', 'date_joined']
     list_filter = ['is_verified', 'role', 'is_active', 'is_staff']
     search_fields = ['email', 'username']
@@ -12,20 +13,48 @@ class UserAdmin(BaseUserAdmin):
 
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Custom Fields', {
-            'fields': ('is_verified', 'role', 'verification_token', 'reset_token')
+            'fields': ('is_verified', 'role')
         }),
     )
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'followers_count', 'following_count', 'created_at']
+    list_select_related = ['user']
     search_fields = ['user__username', 'user__email']
     list_filter = ['created_at']
+    readonly_fields = ['followers_count', 'following_count']
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['follower', 'following', 'created_at']
+    list_select_related = ['follower', 'following__user']
     list_filter = ['created_at']
     search_fields = ['follower__username', 'following__user__username']
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['user', 'suggested', 'score', 'created_at']
+    list_select_related = ['user', 'suggested__user']
+    search_fields = ['user__username']
+    raw_id_fields = ['user', 'suggested']
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+
+
+@admin.register(UserToken)
+class UserTokenAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['user', 'purpose', 'expires_at', 'created_at']
+    list_filter = ['purpose']
+    list_select_related = ['user']
+    search_fields = ['user__email', 'user__username']
+    readonly_fields = ['user', 'purpose', 'token_hash', 'expires_at', 'created_at']
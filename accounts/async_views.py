@@ -0,0 +1,112 @@
+import json
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from rest_framework import exceptions
+from core.renderers import FastJsonResponse
+from core.serializers import compile_serializer
+from . import follow_graph
+from .authentication import CachedJWTAuthentication
+from .hashing import HasherBusy, averify_password
+from .models import User, Profile
+from .tokens import RefreshToken
+from .serializers import UserSerializer, ProfileSerializer
+
+_authentication = CachedJWTAuthentication()
+
+
+def _error(errors, status=400):
+    return FastJsonResponse(errors, status=status)
+
+
+async def login_async(request):
+    """
+    Async counterpart of LoginView for the ASGI deployment: one user fetch,
+    password hashing in a bounded thread pool, transparent rehash on login.
+    """
+    if request.method != 'POST':
+        return _error({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return _error({'detail': "Noto'g'ri JSON."})
+    if not isinstance(data, dict):
+        data = {}
+
+    email = User.objects.normalize_email(str(data.get('email') or ''))
+    password = data.get('password')
+
+    errors = {}
+    if not email:
+        errors['email'] = ['Email manzil kiritish majburiy.']
+    else:
+        try:
+            validate_email(email)
+        except DjangoValidationError:
+            errors['email'] = ['To\'g\'ri email manzil kiriting.']
+    if not password:
+        errors['password'] = ['Parol kiritish majburiy.']
+    if errors:
+        return _error(errors)
+
+    try:
+        user = await User.objects.aget(email=email)
+    except User.DoesNotExist:
+        return _error({'email': ['Bu email manzil bilan foydalanuvchi topilmadi.']})
+
+    if not user.is_verified:
+        return _error({'email': ['Iltimos, avval email manzilingizni tasdiqlang.']})
+
+    try:
+        valid, upgraded_hash = await averify_password(password, user.password)
+    except HasherBusy:
+        response = _error({'detail': "Server band. Birozdan so'ng qayta urinib ko'ring."}, status=503)
+        response['Retry-After'] = '1'
+        return response
+
+    if not valid:
+        return _error({'password': ["Noto'g'ri parol."]})
+
+    if not user.is_active:
+        return _error({'non_field_errors': ['Foydalanuvchi hisobi faol emas.']})
+
+    if upgraded_hash:
+        user.password = upgraded_hash
+        await user.asave(update_fields=['password'])
+
+    refresh = await sync_to_async(RefreshToken.for_user)(user)
+    return FastJsonResponse({
+        'message': 'Zamka ga xush kelibsiz! Muvaffaqiyatli tizimga kirdingiz.',
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'user': UserSerializer(user).data
+    })
+
+
+async def profile_detail_async(request, username):
+    """Async counterpart of ProfileDetailView: one joined fetch via the async ORM plus the follow check."""
+    if request.method != 'GET':
+        return _error({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    try:
+        result = await sync_to_async(_authentication.authenticate)(request)
+    except exceptions.APIException as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        return _error(detail, status=exc.status_code)
+    try:
+        profile = await Profile.objects.select_related('user').aget(user__username=username)
+    except Profile.DoesNotExist:
+        return _error({'detail': 'Not found.'}, status=404)
+
+    data = compile_serializer(ProfileSerializer).to_representation(profile, {'request': request})
+    user = result[0] if result else None
+    data['is_following'] = False
+    if user is not None and user.pk != profile.user_id:
+        data['is_following'] = await sync_to_async(follow_graph.is_following)(user.pk, profile)
+    return FastJsonResponse(data)
+
+
+# django.views.decorators.csrf.csrf_exempt only wraps async views correctly
+# from Django 5.0; mark the view directly like DRF's APIView does.
+login_async.csrf_exempt = True
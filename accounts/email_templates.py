@@ -1,6 +1,10 @@
-def get_password_reset_email(username, reset_token, site_url):
-    """Password reset email template"""
-    return f"""
+import re
+from functools import lru_cache
+from string import Formatter
+from django.conf import settings
+
+
+PASSWORD_RESET_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="uz">
 <head>
@@ -151,12 +155,10 @@ def get_password_reset_email(username, reset_token, site_url):
     </div>
 </body>
 </html>
-    """
+"""
 
 
-def get_verification_email(username, verification_token, site_url):
-    """Email verification template"""
-    return f"""
+VERIFICATION_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="uz">
 <head>
@@ -310,12 +312,10 @@ def get_verification_email(username, verification_token, site_url):
     </div>
 </body>
 </html>
-    """
+"""
 
 
-def get_welcome_email(username):
-    """Welcome email after verification"""
-    return f"""
+WELCOME_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="uz">
 <head>
@@ -430,4 +430,77 @@ def get_welcome_email(username):
     </div>
 </body>
 </html>
+"""
+
+
+_STYLE_RE = re.compile(r'(<style[^>]*>)(.*?)(</style>)', re.S)
+_CSS_PUNCT_RE = re.compile(r'\s*([{}:;,])\s*')
+_BETWEEN_TAGS_RE = re.compile(r'>\s*\n\s*<')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _minify_css(css):
+    css = _CSS_PUNCT_RE.sub(r'\1', css.strip())
+    return css.replace(';}', '}')
+
+
+def minify_html(html):
+    """
+    Collapse indentation and whitespace; safe for these templates (no <pre>).
+    Leading/trailing whitespace is kept as a single space so segments that
+    border a placeholder keep their separator.
     """
+    html = _STYLE_RE.sub(lambda m: m.group(1) + _minify_css(m.group(2)) + m.group(3), html)
+    html = _BETWEEN_TAGS_RE.sub('><', html)
+    return _WHITESPACE_RE.sub(' ', html)
+
+
+class CompiledTemplate:
+    """
+    A str.format-style template split once into static segments and
+    placeholder slots, so rendering is a list copy plus one join.
+    """
+    __slots__ = ('_parts', '_slots')
+
+    def __init__(self, source, minify=False):
+        parts, slots = [''], []
+        for literal, field, _spec, _conv in Formatter().parse(source.strip()):
+            # Formatter splits at every escaped brace; glue static text back together.
+            parts[-1] += literal
+            if field is not None:
+                slots.append((len(parts), field))
+                parts.extend(['', ''])
+        if minify:
+            # Placeholder slots are still empty here, so only static text is touched.
+            parts = [minify_html(part) for part in parts]
+        self._parts = parts
+        self._slots = tuple(slots)
+
+    def render(self, **context):
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            parts[index] = str(context[field])
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=None)
+def _compiled(template):
+    # Compiled on first use rather than at import, keeping worker start-up cheap
+    return CompiledTemplate(template, minify=getattr(settings, 'EMAIL_TEMPLATES_MINIFY', True))
+
+
+def get_password_reset_email(username, reset_token, site_url):
+    """Password reset email template"""
+    return _compiled(PASSWORD_RESET_TEMPLATE).render(username=username, reset_token=reset_token, site_url=site_url)
+
+
+def get_verification_email(username, verification_token, site_url):
+    """Email verification template"""
+    return _compiled(VERIFICATION_TEMPLATE).render(
+        username=username, verification_token=verification_token, site_url=site_url
+    )
+
+
+def get_welcome_email(username):
+    """Welcome email after verification"""
+    return _compiled(WELCOME_TEMPLATE).render(username=username)
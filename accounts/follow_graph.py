@@ -0,0 +1,292 @@
+"""
+Follow graph service: denormalized follower/following counters on Profile
+and an optional in-process adjacency cache for hot accounts.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.db.models import F, OuterRef
+from django.db.models.functions import Greatest
+from core.db import count_subquery
+from .models import Follow, Profile
+from .user_cache import invalidate_user
+
+# Sent after bulk_follow() with the (profile_id, user_id) pairs that were
+# followed; the per-row post_save signal does not fire for bulk_create.
+follows_bulk_created = Signal()
+
+# Following ids of the rows deleted by the running bulk_unfollow() call
+_deleted_follows = ContextVar('deleted_follows', default=None)
+
+
+class FollowerBitmap:
+    """
+    Followers of one profile as a bitmap indexed by user id: one bit per
+    user, O(1) membership and O(1) count.
+    """
+    __slots__ = ('bits', 'count', 'loaded_at')
+
+    def __init__(self, follower_ids):
+        follower_ids = list(follower_ids)
+        self.bits = bytearray((max(follower_ids, default=0) >> 3) + 1)
+        self.count = 0
+        self.loaded_at = time.monotonic()
+        for user_id in follower_ids:
+            self.add(user_id)
+
+    def __contains__(self, user_id):
+        index = user_id >> 3
+        return index < len(self.bits) and bool(self.bits[index] & (1 << (user_id & 7)))
+
+    def add(self, user_id):
+        index = user_id >> 3
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index - len(self.bits) + 1))
+        if not self.bits[index] & (1 << (user_id & 7)):
+            self.bits[index] |= 1 << (user_id & 7)
+            self.count += 1
+
+    def discard(self, user_id):
+        if user_id in self:
+            self.bits[user_id >> 3] &= ~(1 << (user_id & 7))
+            self.count -= 1
+
+
+class AdjacencyCache:
+    """
+    LRU of FollowerBitmaps for profiles with at least `hot_threshold`
+    followers. Entries are updated in place by this process and expire
+    after `ttl` seconds to pick up writes made by other workers.
+    """
+
+    def __init__(self, max_entries, hot_threshold, ttl):
+        self.max_entries = max_entries
+        self.hot_threshold = hot_threshold
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, profile_id):
+        with self._lock:
+            entry = self._entries.get(profile_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.loaded_at > self.ttl:
+                del self._entries[profile_id]
+                return None
+            self._entries.move_to_end(profile_id)
+            return entry
+
+    def load(self, profile):
+        if self.max_entries <= 0 or profile.followers_count < self.hot_threshold:
+            return None
+        entry = FollowerBitmap(
+            Follow.objects.filter(following_id=profile.pk).values_list('follower_id', flat=True).iterator()
+        )
+        with self._lock:
+            self._entries[profile.pk] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def record(self, profile_id, follower_id, following):
+        with self._lock:
+            entry = self._entries.get(profile_id)
+            if entry is None:
+                return
+            if following:
+                entry.add(follower_id)
+            else:
+                entry.discard(follower_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+adjacency_cache = AdjacencyCache(
+    max_entries=settings.FOLLOW_GRAPH_CACHE_SIZE,
+    hot_threshold=settings.FOLLOW_GRAPH_HOT_THRESHOLD,
+    ttl=settings.FOLLOW_GRAPH_CACHE_TTL,
+)
+
+
+def adjust_counts(follower_ids, profile_ids, delta):
+    """Apply +/-delta to followers_count of `profile_ids` and following_count of `follower_ids`."""
+    if not follower_ids and not profile_ids:
+        return
+    with transaction.atomic():
+        _bump(Profile.objects.filter(pk__in=profile_ids), 'followers_count', delta)
+        _bump(Profile.objects.filter(user_id__in=follower_ids), 'following_count', delta)
+        followed_ids = Profile.objects.filter(pk__in=profile_ids).values_list('user_id', flat=True)
+        _invalidate_users([*follower_ids, *followed_ids])
+
+
+def _invalidate_users(user_ids):
+    """
+    Drop the cached auth users once the counter update commits: they carry
+    the profile, and queryset.update() sends no post_save to invalidate it.
+    """
+    user_ids = set(user_ids)
+
+    def invalidate():
+        for user_id in user_ids:
+            invalidate_user(user_id)
+    transaction.on_commit(invalidate)
+
+
+def _bump(queryset, field, delta):
+    if delta >= 0:
+        queryset.update(**{field: F(field) + delta})
+    else:
+        queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def follow_recorded(follow):
+    adjust_counts([follow.follower_id], [follow.following_id], 1)
+    adjacency_cache.record(follow.following_id, follow.follower_id, True)
+
+
+def unfollow_recorded(follow):
+    collected = _deleted_follows.get()
+    if collected is not None:
+        # bulk_unfollow() applies the counters for the rows its DELETE removed
+        collected.append(follow.following_id)
+        return
+    adjust_counts([follow.follower_id], [follow.following_id], -1)
+    adjacency_cache.record(follow.following_id, follow.follower_id, False)
+
+
+def _resolve(usernames):
+    """Map usernames to (profile_id, user_id) in one query; returns (found, missing)."""
+    found = {
+        username: (profile_id, user_id)
+        for username, profile_id, user_id in Profile.objects.filter(user__username__in=usernames)
+        .values_list('user__username', 'id', 'user_id')
+    }
+    missing = [name for name in usernames if name not in found]
+    return found, missing
+
+
+def lock_follower(user):
+    """
+    Row-lock the follower's profile inside the current transaction. Follow
+    rows with follower=user are only written by that user's requests, and
+    all of them take this lock first, so existence checks made after it
+    hold until commit.
+    """
+    list(Profile.objects.select_for_update().filter(user_id=user.pk).values_list('pk', flat=True))
+
+
+def bulk_follow(user, usernames):
+    """
+    Follow several accounts at once: one lookup query, one existence query,
+    one bulk insert and two counter updates. Returns {username: status}.
+    """
+    usernames = list(dict.fromkeys(usernames))
+    found, missing = _resolve(usernames)
+    results = {name: 'not_found' for name in missing}
+
+    if found.pop(user.username, None) is not None:
+        results[user.username] = 'self'
+
+    targets = []
+    with transaction.atomic():
+        lock_follower(user)
+        existing = set(
+            Follow.objects.filter(follower=user, following_id__in=[ids[0] for ids in found.values()])
+            .values_list('following_id', flat=True)
+        )
+        for name, (profile_id, user_id) in found.items():
+            if profile_id in existing:
+                results[name] = 'already_following'
+            else:
+                results[name] = 'followed'
+                targets.append((profile_id, user_id))
+        if targets:
+            Follow.objects.bulk_create([Follow(follower=user, following_id=profile_id) for profile_id, _ in targets])
+            _bump(Profile.objects.filter(pk__in=[profile_id for profile_id, _ in targets]), 'followers_count', 1)
+            _bump(Profile.objects.filter(user=user), 'following_count', len(targets))
+            _invalidate_users([user.pk, *(user_id for _, user_id in targets)])
+
+    if targets:
+        for profile_id, _user_id in targets:
+            adjacency_cache.record(profile_id, user.pk, True)
+        follows_bulk_created.send(sender=Follow, follower=user, targets=targets)
+
+    return {name: results[name] for name in usernames}
+
+
+def bulk_unfollow(user, usernames):
+    """Unfollow several accounts with one lookup, one DELETE and two counter updates."""
+    usernames = list(dict.fromkeys(usernames))
+    found, missing = _resolve(usernames)
+    results = {name: 'not_found' for name in missing}
+
+    with transaction.atomic():
+        lock_follower(user)
+        token = _deleted_follows.set([])
+        try:
+            Follow.objects.filter(follower=user, following_id__in=[ids[0] for ids in found.values()]).delete()
+            removed = _deleted_follows.get()
+        finally:
+            _deleted_follows.reset(token)
+        if removed:
+            _bump(Profile.objects.filter(pk__in=removed), 'followers_count', -1)
+            _bump(Profile.objects.filter(user=user), 'following_count', -len(removed))
+            user_ids = {profile_id: user_id for profile_id, user_id in found.values()}
+            _invalidate_users([user.pk, *(user_ids[profile_id] for profile_id in removed)])
+
+    removed = set(removed)
+    for name, (profile_id, _user_id) in found.items():
+        results[name] = 'unfollowed' if profile_id in removed else 'not_following'
+    for profile_id in removed:
+        adjacency_cache.record(profile_id, user.pk, False)
+
+    return {name: results[name] for name in usernames}
+
+
+def cached_is_following(follower_id, profile):
+    """Membership from the adjacency cache for hot accounts, None for everyone else."""
+    entry = adjacency_cache.get(profile.pk) or adjacency_cache.load(profile)
+    return None if entry is None else follower_id in entry
+
+
+def is_following(follower_id, profile):
+    """Membership check; O(1) for cached hot accounts, one indexed lookup otherwise."""
+    following = cached_is_following(follower_id, profile)
+    if following is not None:
+        return following
+    return Follow.objects.filter(follower_id=follower_id, following_id=profile.pk).exists()
+
+
+def repair_counts(batch_size=1000):
+    """Recompute the denormalized counters from Follow. Returns the number of profiles fixed."""
+    fixed = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Profile.objects.filter(pk__gt=last_pk).order_by('pk').annotate(
+                actual_followers=count_subquery(Follow.objects.filter(following=OuterRef('pk')), 'following'),
+                actual_following=count_subquery(Follow.objects.filter(follower=OuterRef('user')), 'follower'),
+            ).values_list('pk', 'followers_count', 'following_count', 'actual_followers', 'actual_following')
+            [:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        stale = [
+            Profile(pk=pk, followers_count=actual_followers, following_count=actual_following)
+            for pk, followers_count, following_count, actual_followers, actual_following in rows
+            if (followers_count, following_count) != (actual_followers, actual_following)
+        ]
+        if stale:
+            Profile.objects.bulk_update(stale, ['followers_count', 'following_count'])
+            fixed += len(stale)
+
+    adjacency_cache.clear()
+    return fixed
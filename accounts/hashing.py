@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.LOGIN_HASH_WORKERS,
+    thread_name_prefix='password-hash',
+)
+# Caps hashes running or queued in the pool; callers that can't get a slot
+# are rejected instead of piling up behind a login storm.
+_slots = threading.BoundedSemaphore(settings.LOGIN_HASH_WORKERS + settings.LOGIN_HASH_QUEUE_SIZE)
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def _verify(password, encoded):
+    """Return (is_valid, new_encoded); new_encoded is set when the hash needs upgrading."""
+    upgraded = []
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, (upgraded[0] if upgraded else None)
+
+
+async def averify_password(password, encoded):
+    """
+    Verify a password in the bounded hashing pool without blocking the event loop.
+    Raises HasherBusy when the pool and its queue are full.
+    """
+    if not _slots.acquire(blocking=False):
+        raise HasherBusy
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _verify, password, encoded)
+    finally:
+        _slots.release()
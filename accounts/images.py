@@ -0,0 +1,111 @@
+"""
+Profile image pipeline: strips metadata from uploads and renders fixed-size
+square thumbnails in WebP and JPEG on a background thread pool.
+"""
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+from .models import Profile
+from .storage import profile_image_storage
+from .user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PROFILE_IMAGE_WORKERS,
+    thread_name_prefix='profile-image',
+)
+
+
+def _encode(image, fmt):
+    pil_format, options = FORMATS[fmt]
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def render_thumbnails(source_name):
+    """
+    Re-save the original without EXIF/ICC metadata (orientation applied) and
+    write every size/format thumbnail. Files are content-addressed, so the
+    stripped original gets a new name. Returns (image_name, thumbnails).
+    """
+    with profile_image_storage.open(source_name, 'rb') as fh:
+        original = Image.open(fh)
+        original_format = original.format
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    directory = os.path.dirname(os.path.dirname(source_name))
+    image_name = source_name
+
+    # Encoders only write EXIF/ICC/text chunks found in info or passed explicitly
+    clean = image.copy()
+    clean.info = {}
+    if original_format in ('JPEG', 'PNG', 'WEBP'):
+        buffer = io.BytesIO()
+        if original_format == 'PNG':
+            clean.save(buffer, 'PNG', optimize=True)
+        else:
+            clean.convert('RGB').save(buffer, original_format, quality=90)
+        ext = os.path.splitext(source_name)[1]
+        image_name = profile_image_storage.save(
+            os.path.join(directory, f'original{ext}'), ContentFile(buffer.getvalue())
+        )
+
+    rgb = clean.convert('RGB')
+    thumbnails = {'source': image_name}
+    for size in settings.PROFILE_IMAGE_SIZES:
+        thumb = ImageOps.fit(rgb, (size, size), Image.LANCZOS)
+        thumbnails[str(size)] = {
+            fmt: profile_image_storage.save(
+                os.path.join(directory, 'thumbs', f'{size}.{fmt}'), ContentFile(_encode(thumb, fmt))
+            )
+            for fmt in FORMATS
+        }
+    return image_name, thumbnails
+
+
+def process_profile_image(profile_id):
+    """Render thumbnails for the profile's current image and store them on the row."""
+    profile = Profile.objects.only('id', 'user_id', 'image', 'thumbnails').get(pk=profile_id)
+    if not profile.image:
+        if profile.thumbnails:
+            Profile.objects.filter(pk=profile_id).update(thumbnails={})
+            invalidate_user(profile.user_id)
+        return
+    source_name = profile.image.name
+    if profile.thumbnails.get('source') == source_name:
+        return
+    image_name, thumbnails = render_thumbnails(source_name)
+    # Only store if the image wasn't replaced while we were working
+    if Profile.objects.filter(pk=profile_id, image=source_name).update(image=image_name, thumbnails=thumbnails):
+        invalidate_user(profile.user_id)
+        # The upload still carries its EXIF/GPS metadata; drop it unless
+        # another profile uploaded the same file
+        if image_name != source_name and not Profile.objects.filter(image=source_name).exists():
+            profile_image_storage.delete(source_name)
+
+
+def _process_in_worker(profile_id):
+    try:
+        process_profile_image(profile_id)
+    except Exception:
+        logger.exception("Profile image processing failed for profile %s", profile_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_profile_image(profile_id):
+    """Queue thumbnail rendering once the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_process_in_worker, profile_id))
@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from accounts import email_templates
+
+
+class Command(BaseCommand):
+    help = "Measure per-email rendering cost of the precompiled email templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Emails rendered per template")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        cases = [
+            ('password_reset', email_templates.PASSWORD_RESET_TEMPLATE, email_templates.get_password_reset_email,
+             {'username': 'foydalanuvchi', 'reset_token': 'x' * 50, 'site_url': 'https://zamka.uz'}),
+            ('verification', email_templates.VERIFICATION_TEMPLATE, email_templates.get_verification_email,
+             {'username': 'foydalanuvchi', 'verification_token': 'x' * 50, 'site_url': 'https://zamka.uz'}),
+            ('welcome', email_templates.WELCOME_TEMPLATE, email_templates.get_welcome_email,
+             {'username': 'foydalanuvchi'}),
+        ]
+
+        self.stdout.write(f"{'template':<16}{'format() us':>14}{'compiled us':>14}{'bytes before':>14}{'bytes after':>13}")
+        for name, source, render, context in cases:
+            start = time.perf_counter()
+            for _ in range(count):
+                baseline = source.format(**context)
+            baseline_us = (time.perf_counter() - start) / count * 1e6
+
+            start = time.perf_counter()
+            for _ in range(count):
+                html = render(**context)
+            compiled_us = (time.perf_counter() - start) / count * 1e6
+
+            self.stdout.write(
+                f"{name:<16}{baseline_us:>14.2f}{compiled_us:>14.2f}"
+                f"{len(baseline.encode()):>14}{len(html.encode()):>13}"
+            )
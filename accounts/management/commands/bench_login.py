@@ -0,0 +1,43 @@
+import asyncio
+import os
+import time
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from accounts.hashing import HasherBusy, averify_password
+
+
+class Command(BaseCommand):
+    help = "Measure password-verification throughput of the async login path"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        encoded = make_password('benchmark-password')
+        total, concurrency = options['logins'], options['concurrency']
+
+        async def worker(count, stats):
+            for _ in range(count):
+                try:
+                    valid, _ = await averify_password('benchmark-password', encoded)
+                    stats['ok'] += valid
+                except HasherBusy:
+                    stats['busy'] += 1
+
+        async def run():
+            stats = {'ok': 0, 'busy': 0}
+            per_worker = max(total // concurrency, 1)
+            await asyncio.gather(*(worker(per_worker, stats) for _ in range(concurrency)))
+            return stats, per_worker * concurrency
+
+        start = time.perf_counter()
+        stats, attempted = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        workers = min(settings.LOGIN_HASH_WORKERS, os.cpu_count() or 1)
+        per_second = stats['ok'] / elapsed
+        self.stdout.write(f"Hasher: {settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]}")
+        self.stdout.write(f"Attempts: {attempted}, verified: {stats['ok']}, rejected (busy): {stats['busy']}")
+        self.stdout.write(f"Logins/sec: {per_second:.1f} ({per_second / workers:.1f} per core, {workers} cores)")
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from accounts.suggestions import compute_suggestions, sparse
+
+
+class Command(BaseCommand):
+    help = "Precompute friends-of-friends follow suggestions for every user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=20)
+        parser.add_argument('--max-fanout', type=int, default=5000,
+                            help="Ignore intermediate accounts that follow more than this many users")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--no-scipy', action='store_true', help="Force the pure-Python implementation")
+
+    def handle(self, *args, **options):
+        use_scipy = not options['no_scipy'] and sparse is not None
+        start = time.perf_counter()
+        users, rows = compute_suggestions(
+            top_k=options['top_k'],
+            max_fanout=options['max_fanout'],
+            batch_size=options['batch_size'],
+            use_scipy=use_scipy,
+        )
+        self.stdout.write(
+            f"Stored {rows} suggestions for {users} users in {time.perf_counter() - start:.1f}s "
+            f"({'scipy' if use_scipy else 'python'})."
+        )
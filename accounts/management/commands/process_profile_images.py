@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from accounts.images import process_profile_image
+from accounts.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Render missing or stale profile image thumbnails (backfill)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Re-render thumbnails that look current")
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(image='').exclude(image__isnull=True) \
+            .only('id', 'image', 'thumbnails').order_by('pk')
+        processed = failed = 0
+        for profile in profiles.iterator(chunk_size=500):
+            if not options['force'] and profile.thumbnails.get('source') == profile.image.name:
+                continue
+            if options['force']:
+                Profile.objects.filter(pk=profile.pk).update(thumbnails={})
+            try:
+                process_profile_image(profile.pk)
+                processed += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Profile {profile.pk}: {e}")
+        self.stdout.write(f"Processed {processed} profile images, {failed} failed.")
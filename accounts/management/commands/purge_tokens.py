@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.models import UserToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired verification and password reset tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(
+                UserToken.objects.filter(expires_at__lte=now)
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            total += UserToken.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(f"Deleted {total} expired tokens.")
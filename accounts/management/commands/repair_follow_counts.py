@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from accounts.follow_graph import repair_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized follower/following counters from the Follow table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = repair_counts(options['batch_size'])
+        self.stdout.write(f"Repaired {fixed} profiles.")
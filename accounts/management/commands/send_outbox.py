@@ -0,0 +1,23 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from accounts.outbox import send_pending_emails
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches over a reused connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep when the outbox is empty")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_pending_emails(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f"Sent: {sent}, failed: {failed}")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
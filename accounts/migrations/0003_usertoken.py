@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+import hashlib
+
+
+def copy_legacy_tokens(apps, schema_editor):
+    """Move still-pending plaintext tokens into the hashed token table."""
+    User = apps.get_model('accounts', 'User')
+    UserToken = apps.get_model('accounts', 'UserToken')
+    now = timezone.now()
+
+    def hashed(raw):
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    tokens = []
+    pending = User.objects.filter(is_verified=False).exclude(verification_token__isnull=True).exclude(verification_token='')
+    for user_id, token in pending.values_list('id', 'verification_token').iterator():
+        tokens.append(UserToken(user_id=user_id, purpose='verify_email', token_hash=hashed(token),
+                                expires_at=now + settings.VERIFICATION_TOKEN_LIFETIME))
+    resets = User.objects.exclude(reset_token__isnull=True).exclude(reset_token='')
+    for user_id, token in resets.values_list('id', 'reset_token').iterator():
+        tokens.append(UserToken(user_id=user_id, purpose='password_reset', token_hash=hashed(token),
+                                expires_at=now + settings.PASSWORD_RESET_TOKEN_LIFETIME))
+    UserToken.objects.bulk_create(tokens, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('verify_email', 'Email verification'), ('password_reset', 'Password reset')], max_length=20)),
+                ('token_hash', models.CharField(max_length=64, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_legacy_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='verification_token',
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:58
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+
+def fill_counts(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    Follow = apps.get_model('accounts', 'Follow')
+
+    def count(queryset, field):
+        counts = queryset.order_by().values(field).annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Profile.objects.update(
+        followers_count=count(Follow.objects.filter(following=OuterRef('pk')), 'following'),
+        following_count=count(Follow.objects.filter(follower=OuterRef('user')), 'follower'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_usertoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
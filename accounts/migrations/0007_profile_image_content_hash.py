@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:06
+
+import accounts.models
+import accounts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_profile_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=accounts.storage.get_profile_image_storage, upload_to=accounts.models.profile_image_path),
+        ),
+    ]
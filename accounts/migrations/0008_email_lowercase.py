@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:09
+
+import accounts.models
+from django.db import migrations, models
+import django.db.models.functions.text
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    clashes = list(
+        User.objects.order_by().values(lowered=Lower('email'))
+        .annotate(total=Count('*')).filter(total__gt=1).values_list('lowered', flat=True)
+    )
+    if clashes:
+        raise RuntimeError(
+            'These emails belong to several accounts that differ only in case; '
+            'merge or rename them before migrating: ' + ', '.join(clashes)
+        )
+    User.objects.filter(~Q(email=Lower('email'))).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_profile_image_content_hash'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', accounts.models.UserManager()),
+            ],
+        ),
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.CheckConstraint(check=models.Q(('email', django.db.models.functions.text.Lower('email'))), name='accounts_user_email_lowercase'),
+        ),
+    ]
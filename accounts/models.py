@@ -1,18 +1,37 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils.crypto import get_random_string
 from django.core.exceptions import ValidationError
-import uuid
+from django.utils import timezone
+from django.conf import settings
+from core.models import DirtyFieldsMixin
+from .storage import get_profile_image_storage
+import hashlib
 import os
 
 
 def profile_image_path(instance, filename):
+    # The storage renames the file to its content hash inside this directory
     ext = filename.split('.')[-1]
-    filename = f'{uuid.uuid4()}.{ext}'
-    return os.path.join('profiles', str(instance.user.id), filename)
+    return os.path.join('profiles', f'upload.{ext}')
 
 
-class User(AbstractUser):
+class UserManager(BaseUserManager):
+    """
+    Emails are stored lowercased, so case-insensitive lookups are plain
+    equality on the unique email index instead of iexact scans.
+    """
+
+    @classmethod
+    def normalize_email(cls, email):
+        return (email or '').strip().lower()
+
+    def get_by_natural_key(self, username):
+        return super().get_by_natural_key(self.normalize_email(username))
+
+
+class User(DirtyFieldsMixin, AbstractUser):
     ROLE_CHOICES = [
         ('admin', 'Admin'),
         ('user', 'User'),
@@ -26,23 +45,29 @@ class User(AbstractUser):
     })
     is_verified = models.BooleanField(default=False)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='user')
-    verification_token = models.CharField(max_length=100, blank=True, null=True)
-    reset_token = models.CharField(max_length=100, blank=True, null=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.CheckConstraint(check=models.Q(email=Lower('email')), name='accounts_user_email_lowercase'),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.verification_token:
-            self.verification_token = get_random_string(50)
+        self.email = type(self).objects.normalize_email(self.email)
         super().save(*args, **kwargs)
 
+    def generate_verification_token(self):
+        return UserToken.issue(self, UserToken.PURPOSE_VERIFY_EMAIL)
+
     def generate_reset_token(self):
-        self.reset_token = get_random_string(50)
-        self.save()
-        return self.reset_token
+        return UserToken.issue(self, UserToken.PURPOSE_PASSWORD_RESET)
 
     def clean(self):
+        # AbstractUser.clean() normalizes the email, so this hits the unique index
         super().clean()
         if self.email and User.objects.filter(email=self.email).exclude(pk=self.pk).exists():
             raise ValidationError({
@@ -54,24 +79,82 @@ class User(AbstractUser):
             })
 
 
-class Profile(models.Model):
+class UserToken(models.Model):
+    """
+    Single-use email verification / password reset token. Only the SHA-256
+    hash of the token is stored, so lookups hit the unique index.
+    """
+    PURPOSE_VERIFY_EMAIL = 'verify_email'
+    PURPOSE_PASSWORD_RESET = 'password_reset'
+    PURPOSE_CHOICES = [
+        (PURPOSE_VERIFY_EMAIL, 'Email verification'),
+        (PURPOSE_PASSWORD_RESET, 'Password reset'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tokens')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    token_hash = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.purpose} token for {self.user.username}'
+
+    @staticmethod
+    def hash_token(raw_token):
+        return hashlib.sha256(raw_token.encode()).hexdigest()
+
+    @classmethod
+    def lifetime(cls, purpose):
+        if purpose == cls.PURPOSE_PASSWORD_RESET:
+            return settings.PASSWORD_RESET_TOKEN_LIFETIME
+        return settings.VERIFICATION_TOKEN_LIFETIME
+
+    @classmethod
+    def issue(cls, user, purpose):
+        """Replace the user's previous tokens for `purpose` and return a new raw token."""
+        raw_token = get_random_string(50)
+        cls.objects.filter(user=user, purpose=purpose).delete()
+        cls.objects.create(
+            user=user,
+            purpose=purpose,
+            token_hash=cls.hash_token(raw_token),
+            expires_at=timezone.now() + cls.lifetime(purpose),
+        )
+        return raw_token
+
+    @classmethod
+    def consume(cls, raw_token, purpose):
+        """Return the token's user and delete the token, or None if invalid/expired."""
+        try:
+            token = cls.objects.select_related('user').get(
+                token_hash=cls.hash_token(raw_token),
+                purpose=purpose,
+                expires_at__gt=timezone.now(),
+            )
+        except cls.DoesNotExist:
+            return None
+        # Only the request whose DELETE removes the row gets the user, so a
+        # token used by two concurrent requests is consumed exactly once
+        deleted, _ = cls.objects.filter(pk=token.pk).delete()
+        return token.user if deleted else None
+
+
+class Profile(DirtyFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True, null=True, max_length=500)
-    image = models.ImageField(upload_to=profile_image_path, blank=True, null=True)
+    image = models.ImageField(upload_to=profile_image_path, storage=get_profile_image_storage, blank=True, null=True)
+    # {"source": <image name>, "64": {"webp": <path>, "jpeg": <path>}, ...}, see accounts.images
+    thumbnails = models.JSONField(default=dict, blank=True)
+    # Denormalized from Follow, maintained by accounts.follow_graph
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username}'s profile"
 
-    @property
-    def followers_count(self):
-        return self.followers.count()
-
-    @property
-    def following_count(self):
-        return self.user.following.count()
-
 
 class Follow(models.Model):
     follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
@@ -91,3 +174,46 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.follower.username} follows {self.following.user.username}"
+
+
+class FollowSuggestion(models.Model):
+    """Precomputed "who to follow" entry, written by compute_follow_suggestions."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follow_suggestions')
+    suggested = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-score', 'id']
+        unique_together = ('user', 'suggested')
+
+    def __str__(self):
+        return f"{self.suggested.user.username} for {self.user.username} ({self.score})"
+
+
+class OutboxEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to_email} ({self.status})'
@@ -0,0 +1,97 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, message, recipient, html_message=''):
+    """Store an email in the outbox; the send_outbox worker delivers it."""
+    return OutboxEmail.objects.create(
+        to_email=recipient,
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+    )
+
+
+def _claim_batch(batch_size):
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if batch:
+            # Push claimed rows forward so a concurrent worker skips them
+            # even on backends without row locking (SQLite).
+            OutboxEmail.objects.filter(pk__in=[e.pk for e in batch]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+            )
+    return batch
+
+
+def _build_message(email, connection):
+    msg = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.to_email],
+        connection=connection,
+    )
+    if email.html_body:
+        msg.attach_alternative(email.html_body, 'text/html')
+    return msg
+
+
+def _retry_delay(attempts):
+    delay = settings.EMAIL_OUTBOX_RETRY_BASE * (2 ** (attempts - 1))
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_RETRY_MAX))
+
+
+def send_pending_emails(batch_size=None):
+    """
+    Send one batch of due outbox emails over a single SMTP connection.
+    Returns (sent, failed) counts for the batch.
+    """
+    batch = _claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    sent, failed = [], []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning("Email outbox: could not open connection: %s", e)
+        failed = [(email, e) for email in batch]
+    else:
+        try:
+            for email in batch:
+                try:
+                    connection.send_messages([_build_message(email, connection)])
+                    sent.append(email)
+                except Exception as e:
+                    failed.append((email, e))
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    if sent:
+        OutboxEmail.objects.filter(pk__in=[e.pk for e in sent]).update(
+            status='sent', sent_at=now, last_error=''
+        )
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = 'failed'
+        else:
+            email.next_attempt_at = now + _retry_delay(email.attempts)
+        email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+    return len(sent), len(failed)
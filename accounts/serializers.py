@@ -1,9 +1,14 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db import IntegrityError
-from .models import User, Profile, Follow
+from django.conf import settings
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from .models import User, Profile, Follow, FollowSuggestion
+from .tokens import RefreshToken
+from .storage import profile_image_storage
+from . import follow_graph
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -20,8 +25,11 @@ class UserCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['email', 'username', 'password', 'password_confirm']
+        # Uniqueness is enforced by the database constraints and mapped from
+        # IntegrityError in create(), so no exists() queries run up front.
         extra_kwargs = {
             'email': {
+                'validators': [],
                 'error_messages': {
                     'required': 'Email manzil kiritish majburiy.',
                     'invalid': 'To\'g\'ri email manzil kiriting.',
@@ -29,6 +37,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
                 }
             },
             'username': {
+                'validators': [UnicodeUsernameValidator()],
                 'error_messages': {
                     'required': 'Username kiritish majburiy.',
                     'unique': 'Bu username allaqachon band.'
@@ -38,14 +47,10 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
     def validate_email(self, value):
         """Email validation"""
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Bu email manzil allaqachon ro'yxatdan o'tgan.")
-        return value.lower()
+        return User.objects.normalize_email(value)
 
     def validate_username(self, value):
         """Username validation"""
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("Bu username allaqachon band.")
         if len(value) < 3:
             raise serializers.ValidationError("Username kamida 3 ta belgidan iborat bo'lishi kerak.")
         return value
@@ -82,38 +87,33 @@ class UserCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password_confirm')
 
+        user = User(
+            email=validated_data['email'],
+            username=validated_data['username']
+        )
+        user.set_password(validated_data['password'])
+
         try:
-            user = User(
-                email=validated_data['email'].lower(),
-                username=validated_data['username']
-            )
-            user.set_password(validated_data['password'])
-            user.full_clean()  
-            user.save()
+            # The user row and its Profile (post_save signal) are inserted
+            # in one transaction; duplicates surface as IntegrityError.
+            with transaction.atomic():
+                user.save()
 
             return user
 
         except IntegrityError as e:
             if 'email' in str(e).lower():
                 raise serializers.ValidationError({
-                    'email': "Bu email manzil allaqachon ro'yxatdan o'tgan."
+                    'email': ["Bu email manzil allaqachon ro'yxatdan o'tgan."]
                 })
             elif 'username' in str(e).lower():
                 raise serializers.ValidationError({
-                    'username': "Bu username allaqachon band."
+                    'username': ["Bu username allaqachon band."]
                 })
             else:
                 raise serializers.ValidationError({
                     'non_field_errors': ["Foydalanuvchi yaratishda xatolik yuz berdi."]
                 })
-        except DjangoValidationError as e:
-            # Handle model validation errors
-            if hasattr(e, 'error_dict'):
-                raise serializers.ValidationError(e.error_dict)
-            else:
-                raise serializers.ValidationError({
-                    'non_field_errors': [str(e)]
-                })
 
 
 class UserLoginSerializer(serializers.Serializer):
@@ -130,7 +130,7 @@ class UserLoginSerializer(serializers.Serializer):
     )
 
     def validate(self, attrs):
-        email = attrs.get('email', '').lower()
+        email = User.objects.normalize_email(attrs.get('email'))
         password = attrs.get('password')
 
         if not email or not password:
@@ -150,18 +150,19 @@ class UserLoginSerializer(serializers.Serializer):
                 "email": "Iltimos, avval email manzilingizni tasdiqlang."
             })
 
-        user = authenticate(username=email, password=password)
-        if not user:
+        # check_password on the fetched row instead of authenticate(), which
+        # would query the same user again; it also upgrades stale hashes.
+        if not user_obj.check_password(password):
             raise serializers.ValidationError({
                 "password": "Noto'g'ri parol."
             })
 
-        if not user.is_active:
+        if not user_obj.is_active:
             raise serializers.ValidationError({
                 "non_field_errors": ["Foydalanuvchi hisobi faol emas."]
             })
 
-        attrs['user'] = user
+        attrs['user'] = user_obj
         return attrs
 
 
@@ -169,10 +170,64 @@ class ProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     followers_count = serializers.ReadOnlyField()
     following_count = serializers.ReadOnlyField()
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
-        fields = ['id', 'user', 'bio', 'image', 'followers_count', 'following_count']
+        fields = ['id', 'user', 'bio', 'image', 'thumbnails', 'followers_count', 'following_count']
+
+    def get_thumbnails(self, obj):
+        """{"64": {"webp": url, "jpeg": url}, ...}; empty until the current image is processed."""
+        thumbnails = obj.thumbnails or {}
+        if not obj.image or thumbnails.get('source') != obj.image.name:
+            return {}
+        request = self.context.get('request')
+        urls = {}
+        for size, formats in thumbnails.items():
+            if size == 'source':
+                continue
+            urls[size] = {}
+            for fmt, path in formats.items():
+                url = profile_image_storage.url(path)
+                urls[size][fmt] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+class ProfileDetailSerializer(ProfileSerializer):
+    """ProfileSerializer plus whether the requesting user follows the profile."""
+    is_following = serializers.SerializerMethodField()
+
+    class Meta(ProfileSerializer.Meta):
+        fields = ProfileSerializer.Meta.fields + ['is_following']
+
+    def get_is_following(self, obj):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated or user.pk == obj.user_id:
+            return False
+        # O(1) without a query for hot accounts held in the adjacency cache
+        return follow_graph.is_following(user.pk, obj)
+
+
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    profile = ProfileSerializer(source='suggested', read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ['profile', 'score']
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=150),
+        allow_empty=False,
+        max_length=settings.BULK_FOLLOW_MAX_USERNAMES,
+        error_messages={
+            'required': 'Usernamelar ro\'yxatini kiritish majburiy.',
+            'empty': 'Usernamelar ro\'yxati bo\'sh bo\'lmasligi kerak.',
+            'max_length': f'Bir so\'rovda {settings.BULK_FOLLOW_MAX_USERNAMES} tadan ortiq username yuborib bo\'lmaydi.',
+        }
+    )
 
 
 class ProfileUpdateSerializer(serializers.ModelSerializer):
@@ -203,6 +258,9 @@ class PasswordResetSerializer(serializers.Serializer):
         }
     )
 
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
 
 class PasswordResetConfirmSerializer(serializers.Serializer):
     token = serializers.CharField(
@@ -246,3 +304,7 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
                 "password_confirm": "Parollar mos kelmaydi."
             })
         return attrs
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.db import transaction
 from django.contrib.auth import get_user_model
-from .models import Profile
+from .models import Profile, Follow
+from . import follow_graph
+from .user_cache import invalidate_user
+from .typeahead import typeahead_index
 
 User = get_user_model()
 
@@ -11,6 +15,52 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
+def save_user_profile(sender, instance, created, **kwargs):
+    # Only a profile already loaded on this user can carry unsaved edits;
+    # Profile.save() then writes just its changed fields, if any.
+    if not created and sender.profile.related.is_cached(instance):
         instance.profile.save()
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.follow_recorded(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.unfollow_recorded(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_cached_user_profile(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def process_uploaded_image(sender, instance, created, update_fields=None, **kwargs):
+    image_changed = update_fields is None or 'image' in update_fields
+    if image_changed and (instance.image or instance.thumbnails):
+        # Pillow and the worker pool load on the first upload, not at start-up
+        from .images import schedule_profile_image
+        schedule_profile_image(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def update_typeahead_index(sender, instance, **kwargs):
+    user_id, username, is_active = instance.pk, instance.username, instance.is_active
+    transaction.on_commit(lambda: typeahead_index.user_saved(user_id, username, is_active))
+
+
+@receiver(post_delete, sender=User)
+def remove_from_typeahead_index(sender, instance, **kwargs):
+    # pk is cleared on the instance once the delete finishes
+    user_id = instance.pk
+    transaction.on_commit(lambda: typeahead_index.user_deleted(user_id))
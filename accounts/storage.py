@@ -0,0 +1,68 @@
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import LazyObject
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Stores files under <directory>/<aa>/<sha256>.<ext>. Identical uploads map
+    to the same name and are written once, and a name never changes
+    content, so it can be cached as immutable.
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        hexdigest = digest.hexdigest()
+        name = os.path.join(directory, hexdigest[:2], f'{hexdigest}{ext}')
+
+        if self.exists(name):
+            return name
+
+        # Written to a temporary file and hard-linked into place, so readers
+        # never see a partial file. A concurrent save of the same content may
+        # link first; both hold identical bytes, so its file is kept.
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            try:
+                os.link(tmp_path, full_path)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(tmp_path)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save()
+        return name
+
+
+class _ProfileImageStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = ContentHashStorage()
+
+
+profile_image_storage = _ProfileImageStorage()
+
+
+def get_profile_image_storage():
+    return profile_image_storage
@@ -0,0 +1,133 @@
+"""
+"Who to follow" batch job: friends-of-friends scoring over the Follow graph.
+
+A candidate's score is the number of accounts the user follows that also
+follow the candidate. Uses SciPy sparse matrices when installed and a
+pure-Python adjacency-list fallback otherwise.
+"""
+import heapq
+from array import array
+from django.db import transaction
+from django.utils import timezone
+from .models import Follow, FollowSuggestion, Profile
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+def load_edges(chunk_size=10000):
+    """Return the follow graph as two parallel arrays of user ids (follower -> followed)."""
+    src, dst = array('q'), array('q')
+    edges = Follow.objects.order_by().values_list('follower_id', 'following__user_id')
+    for follower_id, followed_id in edges.iterator(chunk_size=chunk_size):
+        src.append(follower_id)
+        dst.append(followed_id)
+    return src, dst
+
+
+def _sort_key(item):
+    user_id, score = item
+    return score, -user_id
+
+
+def top_k_python(src, dst, top_k, max_fanout):
+    following = {}
+    for a, b in zip(src, dst):
+        following.setdefault(a, array('q')).append(b)
+
+    for user_id, outs in following.items():
+        seen = set(outs)
+        seen.add(user_id)
+        scores = {}
+        for middle in outs:
+            hops = following.get(middle)
+            if not hops or len(hops) > max_fanout:
+                continue
+            for candidate in hops:
+                if candidate not in seen:
+                    scores[candidate] = scores.get(candidate, 0) + 1
+        if scores:
+            yield user_id, heapq.nlargest(top_k, scores.items(), key=_sort_key)
+
+
+def top_k_scipy(src, dst, top_k, max_fanout, chunk_rows=5000):
+    src = np.frombuffer(src, dtype=np.int64)
+    dst = np.frombuffer(dst, dtype=np.int64)
+    ids, inverse = np.unique(np.concatenate([src, dst]), return_inverse=True)
+    n = len(ids)
+    rows, cols = inverse[:len(src)], inverse[len(src):]
+
+    adjacency = sparse.csr_matrix((np.ones(len(src), dtype=np.int32), (rows, cols)), shape=(n, n))
+    # Accounts that follow too many others are not used as intermediate hops
+    out_degree = np.diff(adjacency.indptr)
+    hops = sparse.diags((out_degree <= max_fanout).astype(np.int32), dtype=np.int32) @ adjacency
+
+    for start in range(0, n, chunk_rows):
+        block = adjacency[start:start + chunk_rows]
+        scores = block @ hops
+        # Drop candidates the user already follows
+        scores = (scores - scores.multiply(block)).tocsr()
+        scores.eliminate_zeros()
+
+        for i in range(block.shape[0]):
+            lo, hi = scores.indptr[i], scores.indptr[i + 1]
+            if lo == hi:
+                continue
+            candidates, values = scores.indices[lo:hi], scores.data[lo:hi]
+            keep = candidates != start + i
+            candidates, values = candidates[keep], values[keep]
+            if not len(values):
+                continue
+            if len(values) > top_k:
+                # Keep everything tied with the k-th score so ties break by id below
+                threshold = -np.partition(-values, top_k - 1)[top_k - 1]
+                picked = values >= threshold
+                candidates, values = candidates[picked], values[picked]
+            order = np.lexsort((ids[candidates], -values))[:top_k]
+            yield int(ids[start + i]), [
+                (int(ids[c]), int(v)) for c, v in zip(candidates[order], values[order])
+            ]
+
+
+def compute_suggestions(top_k=20, max_fanout=5000, batch_size=500, use_scipy=True):
+    """Rebuild FollowSuggestion for every user with outgoing follows. Returns (users, rows)."""
+    started = timezone.now()
+    src, dst = load_edges()
+    profile_ids = dict(Profile.objects.values_list('user_id', 'id').iterator(chunk_size=10000))
+
+    if use_scipy and sparse is not None:
+        results = top_k_scipy(src, dst, top_k, max_fanout)
+    else:
+        results = top_k_python(src, dst, top_k, max_fanout)
+
+    users = rows = 0
+    batch = {}
+    for user_id, suggestions in results:
+        batch[user_id] = suggestions
+        if len(batch) >= batch_size:
+            rows += _write_batch(batch, profile_ids)
+            users += len(batch)
+            batch = {}
+    if batch:
+        rows += _write_batch(batch, profile_ids)
+        users += len(batch)
+
+    # Anything not rewritten by this run belongs to users without candidates now
+    FollowSuggestion.objects.filter(created_at__lt=started).delete()
+    return users, rows
+
+
+def _write_batch(batch, profile_ids):
+    objects = [
+        FollowSuggestion(user_id=user_id, suggested_id=profile_ids[candidate], score=score)
+        for user_id, suggestions in batch.items()
+        for candidate, score in suggestions
+        if candidate in profile_ids
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=list(batch)).delete()
+        FollowSuggestion.objects.bulk_create(objects, batch_size=1000)
+    return len(objects)
@@ -1,3 +1,771 @@
-from django.test import TestCase
+import io
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+from array import array
+from datetime import timedelta
+from unittest import mock, skipIf
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from blog.models import Notification
+from core.warmup import warm_up
+from . import email_templates, follow_graph, hashing, suggestions
+from .images import process_profile_image
+from .models import Follow, FollowSuggestion, OutboxEmail, User, Profile, UserToken
+from .outbox import _claim_batch, enqueue_email, send_pending_emails
+from .storage import profile_image_storage
+from .tokens import BlacklistFilter, BloomFilter
+from .typeahead import PrefixIndex, TypeaheadIndex, typeahead_index
+from .serializers import UserCreateSerializer
 
-# Create your tests here.
+
+class RegistrationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.data = {
+            'email': 'Ali@Example.com',
+            'username': 'ali_valiyev',
+            'password': 'Kuchli-Parol-2024',
+            'password_confirm': 'Kuchli-Parol-2024',
+        }
+
+    def test_create_user_and_profile_queries(self):
+        serializer = UserCreateSerializer(data=self.data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        # SAVEPOINT, INSERT user, INSERT profile, RELEASE SAVEPOINT
+        with self.assertNumQueries(4):
+            user = serializer.save()
+
+        self.assertEqual(user.email, 'ali@example.com')
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+    def test_validation_runs_no_queries(self):
+        serializer = UserCreateSerializer(data=self.data)
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_duplicate_email_maps_to_error_message(self):
+        User.objects.create_user(email='ali@example.com', username='boshqa', password='x')
+
+        response = self.client.post(reverse('register'), self.data, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['email'], ["Bu email manzil allaqachon ro'yxatdan o'tgan."])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_duplicate_username_maps_to_error_message(self):
+        User.objects.create_user(email='boshqa@example.com', username='ali_valiyev', password='x')
+
+        response = self.client.post(reverse('register'), self.data, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['username'], ["Bu username allaqachon band."])
+        self.assertEqual(Profile.objects.count(), 1)
+
+
+class DirtyFieldSaveTests(TestCase):
+    def setUp(self):
+        created = User.objects.create_user(email='vali@example.com', username='vali', password='x')
+        self.user = User.objects.get(pk=created.pk)
+
+    def test_unchanged_user_save_writes_nothing(self):
+        with self.assertNumQueries(0):
+            self.user.save()
+
+    def test_only_changed_fields_are_written(self):
+        self.user.first_name = 'Vali'
+
+        with self.assertNumQueries(1) as ctx:
+            self.user.save()
+
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('"first_name"', sql)
+        self.assertNotIn('"email"', sql)
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, 'Vali')
+
+    def test_user_save_does_not_touch_profile(self):
+        profile = self.user.profile
+        updated_at = profile.updated_at
+        self.user.is_verified = True
+
+        with self.assertNumQueries(1):
+            self.user.save()
+
+        self.assertEqual(Profile.objects.get(pk=profile.pk).updated_at, updated_at)
+
+    def test_loading_deferred_field_keeps_other_edits(self):
+        profile = Profile.objects.only('id', 'user_id').get(user=self.user)
+        profile.bio = 'Salom'
+        profile.thumbnails  # loads the deferred field through refresh_from_db(fields=[...])
+        profile.save()
+        self.assertEqual(Profile.objects.get(pk=profile.pk).bio, 'Salom')
+
+    def test_partial_refresh_keeps_other_edits(self):
+        self.user.first_name = 'Vali'
+        self.user.refresh_from_db(fields=['last_name'])
+        self.user.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, 'Vali')
+
+    def test_in_place_json_change_is_saved(self):
+        profile = Profile.objects.get(user=self.user)
+        profile.thumbnails['source'] = 'profiles/aa/rasm.jpg'
+        self.assertEqual(profile.get_dirty_fields(), ['thumbnails'])
+        profile.save()
+        self.assertEqual(Profile.objects.get(pk=profile.pk).thumbnails, {'source': 'profiles/aa/rasm.jpg'})
+
+    def test_user_save_writes_edited_profile(self):
+        self.user.first_name = 'Vali'
+        self.user.profile.bio = 'Salom'
+
+        with self.assertNumQueries(2):
+            self.user.save()
+
+        self.assertEqual(Profile.objects.get(user=self.user).bio, 'Salom')
+
+    def test_generate_reset_token_skips_user_and_profile_writes(self):
+        self.user.profile
+        # DELETE old tokens, INSERT new token
+        with self.assertNumQueries(2):
+            self.user.generate_reset_token()
+
+
+class EmailNormalizationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='Sardor@Example.COM', username='sardor', password='Kuchli-Parol-2024')
+        User.objects.filter(pk=self.user.pk).update(is_verified=True)
+
+    def test_email_is_stored_lowercased(self):
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, 'sardor@example.com')
+
+    def test_login_with_mixed_case_email(self):
+        response = self.client.post(
+            reverse('login'), {'email': 'SARDOR@example.com', 'password': 'Kuchli-Parol-2024'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_natural_key_lookup_is_case_insensitive(self):
+        self.assertEqual(User.objects.get_by_natural_key('Sardor@EXAMPLE.com').pk, self.user.pk)
+
+    def test_password_reset_with_mixed_case_email(self):
+        self.client.post(reverse('password_reset'), {'email': 'sArDoR@example.com'}, format='json')
+        self.assertTrue(self.user.tokens.filter(purpose='password_reset').exists())
+
+
+class ProfileImageStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def jpeg_with_exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Kamera'  # Make
+        buffer = io.BytesIO()
+        Image.new('RGB', (32, 32), 'red').save(buffer, 'JPEG', exif=exif)
+        return buffer.getvalue()
+
+    def test_identical_content_is_stored_once(self):
+        first = profile_image_storage.save('profiles/upload.jpg', ContentFile(b'bir xil'))
+        second = profile_image_storage.save('profiles/upload.jpg', ContentFile(b'bir xil'))
+        self.assertEqual(first, second)
+        self.assertEqual(os.listdir(os.path.dirname(profile_image_storage.path(first))), [os.path.basename(first)])
+
+    def test_concurrent_identical_save_keeps_existing_file(self):
+        name = profile_image_storage.save('profiles/upload.jpg', ContentFile(b'bir xil'))
+        # Another worker wrote the file between our exists() check and the write
+        with mock.patch.object(type(profile_image_storage._wrapped), 'exists', return_value=False):
+            self.assertEqual(profile_image_storage.save('profiles/upload.jpg', ContentFile(b'bir xil')), name)
+        with profile_image_storage.open(name) as fh:
+            self.assertEqual(fh.read(), b'bir xil')
+
+    def test_processing_deletes_upload_with_metadata(self):
+        user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        source = profile_image_storage.save('profiles/upload.jpg', ContentFile(self.jpeg_with_exif()))
+        Profile.objects.filter(user=user).update(image=source)
+
+        process_profile_image(user.profile.pk)
+
+        profile = Profile.objects.get(user=user)
+        self.assertNotEqual(profile.image.name, source)
+        self.assertFalse(profile_image_storage.exists(source))
+        with profile_image_storage.open(profile.image.name) as fh:
+            self.assertFalse(Image.open(fh).getexif())
+
+    def test_shared_upload_is_kept(self):
+        users = [User.objects.create_user(email=f'u{i}@example.com', username=f'u{i}', password='x') for i in range(2)]
+        source = profile_image_storage.save('profiles/upload.jpg', ContentFile(self.jpeg_with_exif()))
+        Profile.objects.filter(user__in=users).update(image=source)
+
+        process_profile_image(users[0].profile.pk)
+        self.assertTrue(profile_image_storage.exists(source))
+
+
+class UserTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+
+    def test_token_is_consumed_once(self):
+        raw = UserToken.issue(self.user, UserToken.PURPOSE_PASSWORD_RESET)
+        self.assertEqual(UserToken.consume(raw, UserToken.PURPOSE_PASSWORD_RESET), self.user)
+        self.assertIsNone(UserToken.consume(raw, UserToken.PURPOSE_PASSWORD_RESET))
+
+    def test_concurrently_consumed_token_is_rejected(self):
+        raw = UserToken.issue(self.user, UserToken.PURPOSE_PASSWORD_RESET)
+        token = UserToken.objects.select_related('user').get(token_hash=UserToken.hash_token(raw))
+
+        def read_then_lose_race(**lookup):
+            # A concurrent request consumes the token right after this one read it
+            UserToken.objects.filter(pk=token.pk).delete()
+            return token
+        lookup = mock.Mock(get=mock.Mock(side_effect=read_then_lose_race))
+        with mock.patch.object(UserToken.objects, 'select_related', return_value=lookup):
+            self.assertIsNone(UserToken.consume(raw, UserToken.PURPOSE_PASSWORD_RESET))
+
+
+class FollowGraphCacheTests(TestCase):
+    def setUp(self):
+        self.star = User.objects.create_user(email='star@example.com', username='star', password='x')
+        self.fans = [
+            User.objects.create_user(email=f'fan{i}@example.com', username=f'fan{i}', password='x') for i in range(3)
+        ]
+        for fan in self.fans[:2]:
+            Follow.objects.create(follower=fan, following=self.star.profile)
+        self.star.profile.refresh_from_db()
+        patcher = mock.patch.object(follow_graph.adjacency_cache, 'hot_threshold', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(follow_graph.adjacency_cache.clear)
+        follow_graph.adjacency_cache.clear()
+
+    def test_hot_account_membership_runs_no_queries(self):
+        follow_graph.is_following(self.fans[0].pk, self.star.profile)  # loads the bitmap
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.is_following(self.fans[1].pk, self.star.profile))
+            self.assertFalse(follow_graph.is_following(self.fans[2].pk, self.star.profile))
+
+    def test_cache_follows_writes_of_this_process(self):
+        follow_graph.is_following(self.fans[0].pk, self.star.profile)
+        Follow.objects.create(follower=self.fans[2], following=self.star.profile)
+        Follow.objects.get(follower=self.fans[0]).delete()
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.is_following(self.fans[2].pk, self.star.profile))
+            self.assertFalse(follow_graph.is_following(self.fans[0].pk, self.star.profile))
+
+    def test_writes_ignore_a_stale_cache(self):
+        follow_graph.is_following(self.fans[0].pk, self.star.profile)
+        client = APIClient()
+        # Another worker's unfollow and follow, which this process never saw
+        follow_graph.adjacency_cache.record(self.star.profile.pk, self.fans[2].pk, True)
+        follow_graph.adjacency_cache.record(self.star.profile.pk, self.fans[0].pk, False)
+
+        client.force_authenticate(self.fans[2])
+        response = client.post(reverse('follow_user', kwargs={'username': 'star'}))
+        self.assertEqual(response.status_code, 200)
+        client.force_authenticate(self.fans[0])
+        response = client.post(reverse('unfollow_user', kwargs={'username': 'star'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(Follow.objects.filter(following=self.star.profile).values_list('follower_id', flat=True)),
+            {self.fans[1].pk, self.fans[2].pk},
+        )
+
+    def test_profile_detail_reports_follow_state(self):
+        client = APIClient()
+        client.force_authenticate(self.fans[0])
+        response = client.get(reverse('profile_detail', kwargs={'username': 'star'}))
+        self.assertTrue(response.json()['is_following'])
+        client.force_authenticate(self.fans[2])
+        response = client.get(reverse('profile_detail', kwargs={'username': 'star'}))
+        self.assertFalse(response.json()['is_following'])
+
+
+class BulkFollowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.others = [
+            User.objects.create_user(email=f'u{i}@example.com', username=f'u{i}', password='x') for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertCountsMatchRows(self):
+        for user in [self.user] + self.others:
+            profile = Profile.objects.get(user=user)
+            self.assertEqual(profile.followers_count, Follow.objects.filter(following=profile).count())
+            self.assertEqual(profile.following_count, Follow.objects.filter(follower=user).count())
+
+    def test_bulk_follow_statuses_and_counters(self):
+        Follow.objects.create(follower=self.user, following=self.others[0].profile)
+        response = self.client.post(reverse('bulk_follow'), {
+            'usernames': ['u0', 'u1', 'u1', 'olim', 'yoq', 'u2'],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {item['username']: item['status'] for item in response.json()['results']},
+            {'u0': 'already_following', 'u1': 'followed', 'olim': 'self', 'yoq': 'not_found', 'u2': 'followed'},
+        )
+        self.assertEqual(response.json()['following_count'], 3)
+        self.assertCountsMatchRows()
+
+    def test_repeated_bulk_follow_notifies_once(self):
+        for _ in range(2):
+            self.client.post(reverse('bulk_follow'), {'usernames': ['u0', 'u1']}, format='json')
+        self.assertCountsMatchRows()
+        for other in self.others[:2]:
+            self.assertEqual(Notification.objects.filter(recipient=other, actor=self.user).count(), 1)
+
+    def test_bulk_unfollow_statuses_and_counters(self):
+        for other in self.others[:2]:
+            Follow.objects.create(follower=self.user, following=other.profile)
+        response = self.client.post(reverse('bulk_unfollow'), {
+            'usernames': ['u0', 'u1', 'u2', 'yoq'],
+        }, format='json')
+        self.assertEqual(
+            {item['username']: item['status'] for item in response.json()['results']},
+            {'u0': 'unfollowed', 'u1': 'unfollowed', 'u2': 'not_following', 'yoq': 'not_found'},
+        )
+        self.assertEqual(response.json()['following_count'], 0)
+        self.assertFalse(Follow.objects.filter(follower=self.user).exists())
+        self.assertCountsMatchRows()
+
+    def test_single_unfollow_outside_bulk_still_adjusts_counters(self):
+        self.client.post(reverse('bulk_follow'), {'usernames': ['u0', 'u1']}, format='json')
+        self.client.post(reverse('unfollow_user', kwargs={'username': 'u0'}))
+        self.assertCountsMatchRows()
+        self.assertEqual(Profile.objects.get(user=self.user).following_count, 1)
+
+
+@override_settings(AUTH_USER_CACHE_TTL=30)
+class CachedUserAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_repeated_profile_me_runs_no_queries(self):
+        self.assertEqual(self.client.get(reverse('current_profile')).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('current_profile'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_counters_are_fresh_in_profile_me(self):
+        other = User.objects.create_user(email='aziz@example.com', username='aziz', password='x')
+        other_client = APIClient()
+        other_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(other).access_token}')
+        self.assertEqual(self.client.get(reverse('current_profile')).json()['following_count'], 0)
+        self.assertEqual(other_client.get(reverse('current_profile')).json()['followers_count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('follow_user', kwargs={'username': 'aziz'}))
+        self.assertEqual(self.client.get(reverse('current_profile')).json()['following_count'], 1)
+        self.assertEqual(other_client.get(reverse('current_profile')).json()['followers_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('bulk_unfollow'), {'usernames': ['aziz']}, format='json')
+        self.assertEqual(self.client.get(reverse('current_profile')).json()['following_count'], 0)
+        self.assertEqual(other_client.get(reverse('current_profile')).json()['followers_count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('bulk_follow'), {'usernames': ['aziz']}, format='json')
+        self.assertEqual(self.client.get(reverse('current_profile')).json()['following_count'], 1)
+        self.assertEqual(other_client.get(reverse('current_profile')).json()['followers_count'], 1)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_disabled_cache_reads_the_user_every_time(self):
+        self.assertEqual(self.client.get(reverse('current_profile')).status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('current_profile')).status_code, 401)
+
+    def test_deactivation_invalidates_cached_user(self):
+        self.assertEqual(self.client.get(reverse('current_profile')).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('current_profile')).status_code, 401)
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch('accounts.tokens.blacklist_filter', BlacklistFilter())
+        self.filter = patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def refresh_with(self, token):
+        return APIClient().post(reverse('token_refresh'), {'refresh': str(token)}, format='json')
+
+    def test_logout_blacklists_refresh_token(self):
+        self.assertFalse(self.filter.is_blacklisted(self.refresh['jti']))
+        response = self.client.post(reverse('logout'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=self.refresh['jti']).exists())
+        self.assertTrue(self.filter.is_blacklisted(self.refresh['jti']))
+
+    def test_refresh_after_logout_is_rejected(self):
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 200)
+        # The rotated-out token is blacklisted as well
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+        fresh = RefreshToken.for_user(self.user)
+        self.client.post(reverse('logout'), {'refresh': str(fresh)}, format='json')
+        self.assertEqual(self.refresh_with(fresh).status_code, 401)
+
+    def test_rebuild_keeps_serving_the_previous_filter(self):
+        self.client.post(reverse('logout'), {'refresh': str(self.refresh)}, format='json')
+        self.filter.is_blacklisted(self.refresh['jti'])
+        live = self.filter._bloom
+        cache.set(BlacklistFilter.generation_key, 'rebuild')
+
+        def add_while_live_filter_is_checked(bloom, value):
+            self.assertIs(self.filter._bloom, live)
+            self.assertIn(self.refresh['jti'], self.filter._bloom)
+            add(bloom, value)
+        add = BloomFilter.add
+        with mock.patch.object(BloomFilter, 'add', add_while_live_filter_is_checked), \
+                override_settings(BLACKLIST_BLOOM_REBUILD_INTERVAL=-1):
+            self.assertTrue(self.filter.is_blacklisted(self.refresh['jti']))
+        self.assertIsNot(self.filter._bloom, live)
+
+    @override_settings(BLACKLIST_BLOOM_SYNC_INTERVAL=0)
+    def test_logout_on_another_worker_is_seen_without_a_shared_cache(self):
+        self.assertFalse(self.filter.is_blacklisted(self.refresh['jti']))
+        # Another worker's logout: the row exists, but no generation reaches this process
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=self.refresh['jti']))
+        self.assertTrue(self.filter.is_blacklisted(self.refresh['jti']))
+
+    def test_purge_blacklist_deletes_only_expired_tokens(self):
+        current = RefreshToken.for_user(self.user)
+        for token in (self.refresh, current):
+            token.blacklist()
+        OutstandingToken.objects.filter(jti=self.refresh['jti']).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        call_command('purge_blacklist', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(
+            list(BlacklistedToken.objects.values_list('token__jti', flat=True)), [current['jti']]
+        )
+        self.assertFalse(OutstandingToken.objects.filter(jti=self.refresh['jti']).exists())
+
+
+class TypeaheadIndexTests(TestCase):
+    def setUp(self):
+        names = ['ali', 'alisher', 'alibek', 'aziz', 'Azamat', 'bobur', 'botir', 'alina', 'aliya', 'al']
+        self.rows = [(index + 1, name, (index * 7) % 5) for index, name in enumerate(names)]
+        self.index = PrefixIndex(max_results=3, scan_limit=2)
+        self.index.replace(self.rows)
+
+    def expected(self, rows, prefix, limit=3):
+        matches = sorted((-count, name.lower(), user_id, name) for user_id, name, count in rows
+                         if name.lower().startswith(prefix))
+        return [(user_id, name, -negative_count) for negative_count, _key, user_id, name in matches[:limit]]
+
+    def test_every_prefix_matches_a_full_scan(self):
+        for _user_id, name, _count in self.rows:
+            for length in range(1, len(name) + 1):
+                prefix = name[:length].lower()
+                self.assertEqual(self.index.search(prefix, 3), self.expected(self.rows, prefix), prefix)
+
+    def test_wide_prefixes_are_precomputed(self):
+        with mock.patch.object(PrefixIndex, '_rank', side_effect=AssertionError("scanned")):
+            self.assertEqual(self.index.search('al', 3), self.expected(self.rows, 'al'))
+            self.assertEqual(self.index.search('a', 2), self.expected(self.rows, 'a', 2))
+
+    def test_new_users_update_precomputed_results(self):
+        self.index.upsert(20, 'Alpomish', 9)
+        rows = self.rows + [(20, 'Alpomish', 9)]
+        with mock.patch.object(PrefixIndex, '_rank', side_effect=AssertionError("scanned")):
+            self.assertEqual(self.index.search('al', 3), self.expected(rows, 'al'))
+        self.index.remove(20)
+        self.index.upsert(1, 'vali')
+        rows = [(1, 'vali', self.rows[0][2])] + self.rows[1:]
+        for prefix in ('a', 'al', 'ali', 'v'):
+            self.assertEqual(self.index.search(prefix, 3), self.expected(rows, prefix), prefix)
+
+    def test_warm_up_survives_an_unavailable_database(self):
+        User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        typeahead_index._loaded_at = None
+        self.addCleanup(setattr, typeahead_index, '_loaded_at', None)
+        error = OperationalError('no such table: accounts_profile')
+        with mock.patch.object(TypeaheadIndex, '_load', side_effect=error), \
+                self.assertLogs('core.warmup', 'WARNING'):
+            self.assertEqual(warm_up()['indexes'][0], 0)
+        self.assertIsNone(typeahead_index._loaded_at)
+        self.assertEqual([row[1] for row in typeahead_index.search('ol')], ['olim'])
+
+    def test_warm_up_loads_the_index(self):
+        User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        typeahead_index._loaded_at = None
+        self.addCleanup(setattr, typeahead_index, '_loaded_at', None)
+        self.assertEqual(warm_up()['indexes'][0], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual([row[1] for row in typeahead_index.search('ol')], ['olim'])
+
+
+@override_settings(EMAIL_OUTBOX_RETRY_BASE=30, EMAIL_OUTBOX_RETRY_MAX=100, EMAIL_OUTBOX_MAX_ATTEMPTS=3)
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.ok = enqueue_email('Salom', 'Matn', 'ali@example.com', html_message='<p>Matn</p>')
+        self.bad = enqueue_email('Salom', 'Matn', 'xato@example.com')
+        OutboxEmail.objects.filter(pk=self.bad.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.send_messages = locmem.EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            if messages[0].to == ['xato@example.com']:
+                raise ConnectionError('rad etildi')
+            return self.send_messages(backend, messages)
+
+        patcher = mock.patch.object(locmem.EmailBackend, 'send_messages', send_messages)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_due(self):
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_command_sends_the_batch_and_records_failures(self):
+        out = io.StringIO()
+        call_command('send_outbox', stdout=out)
+        self.assertIn('Sent: 1, failed: 1', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Matn</p>', 'text/html')])
+
+        self.ok.refresh_from_db()
+        self.bad.refresh_from_db()
+        self.assertEqual(self.ok.status, 'sent')
+        self.assertIsNotNone(self.ok.sent_at)
+        self.assertEqual((self.bad.status, self.bad.attempts, self.bad.last_error), ('pending', 1, 'rad etildi'))
+
+    def test_failed_emails_back_off_until_they_give_up(self):
+        delays = []
+        for attempt in range(3):
+            self.make_due()
+            before = timezone.now()
+            send_pending_emails()
+            self.bad.refresh_from_db()
+            self.assertEqual(self.bad.attempts, attempt + 1)
+            delays.append(round((self.bad.next_attempt_at - before).total_seconds()))
+            self.assertEqual(send_pending_emails(), (0, 0))
+        self.assertEqual(delays[:2], [30, 60])
+        self.assertEqual(self.bad.status, 'failed')
+
+        self.make_due()
+        self.assertEqual(send_pending_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_claimed_rows_are_skipped_by_other_workers(self):
+        with override_settings(EMAIL_OUTBOX_CLAIM_TIMEOUT=300):
+            claimed = _claim_batch(1)
+        self.assertEqual([email.pk for email in claimed], [self.bad.pk])
+        self.assertEqual([email.pk for email in _claim_batch(10)], [self.ok.pk])
+        self.assertEqual(_claim_batch(10), [])
+        self.assertGreater(OutboxEmail.objects.get(pk=self.bad.pk).next_attempt_at,
+                           timezone.now() + timedelta(seconds=290))
+
+    def test_connection_failure_retries_the_whole_batch(self):
+        with mock.patch.object(locmem.EmailBackend, 'open', side_effect=OSError('ulanib bo\'lmadi')), \
+                self.assertLogs('accounts.outbox', 'WARNING'):
+            self.assertEqual(send_pending_emails(), (0, 2))
+        self.assertEqual(list(OutboxEmail.objects.values_list('status', 'attempts').distinct()), [('pending', 1)])
+        self.assertEqual(mail.outbox, [])
+
+
+def _visible_html(html):
+    # Markup and text with <style> bodies dropped and whitespace collapsed
+    html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.S)
+    return re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', html)).strip()
+
+
+class EmailTemplateTests(SimpleTestCase):
+    cases = [
+        (email_templates.PASSWORD_RESET_TEMPLATE, email_templates.get_password_reset_email,
+         {'username': 'ali  {valiyev}', 'reset_token': 'a1b2c3', 'site_url': 'https://zamka.uz'}),
+        (email_templates.VERIFICATION_TEMPLATE, email_templates.get_verification_email,
+         {'username': 'ali', 'verification_token': 'd4e5f6', 'site_url': 'https://zamka.uz'}),
+        (email_templates.WELCOME_TEMPLATE, email_templates.get_welcome_email, {'username': '<b>ali</b>'}),
+    ]
+
+    def setUp(self):
+        email_templates._compiled.cache_clear()
+        self.addCleanup(email_templates._compiled.cache_clear)
+
+    def test_unminified_output_matches_format(self):
+        for source, _render, context in self.cases:
+            compiled = email_templates.CompiledTemplate(source)
+            self.assertEqual(compiled.render(**context), source.format(**context).strip())
+
+    def test_minified_output_keeps_markup_and_values(self):
+        for source, render, context in self.cases:
+            baseline = source.format(**context)
+            html = render(**context)
+            self.assertLess(len(html), len(baseline))
+            self.assertEqual(_visible_html(html), _visible_html(baseline))
+            for value in context.values():
+                self.assertIn(value, html)
+        html = self.cases[0][1](**self.cases[0][2])
+        self.assertIn('body{font-family:', html)
+        self.assertNotIn('{{', html)
+
+    @override_settings(EMAIL_TEMPLATES_MINIFY=False)
+    def test_minify_setting_can_be_disabled(self):
+        source, render, context = self.cases[2]
+        self.assertEqual(render(**context), source.format(**context).strip())
+
+    def test_bench_command_reports_every_template(self):
+        out = io.StringIO()
+        call_command('bench_email_templates', count=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:]], ['password_reset', 'verification', 'welcome'])
+
+
+class AsyncLoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='ali@example.com', username='ali', password='Kuchli-Parol-2024')
+        User.objects.filter(pk=self.user.pk).update(is_verified=True)
+
+    def login(self, url_name='login_async', **data):
+        data = {'email': 'Ali@Example.com', 'password': 'Kuchli-Parol-2024', **data}
+        return self.client.post(reverse(url_name), data, content_type='application/json')
+
+    def test_matches_the_sync_login(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RefreshToken(response.json()['refresh'])['user_id'], self.user.pk)
+        sync = self.login('login')
+        self.assertEqual(response.json()['user'], sync.json()['user'])
+        self.assertEqual(response.json()['message'], sync.json()['message'])
+
+        for data in ({'password': 'notogri'}, {'email': 'yoq@example.com'}, {'email': 'email-emas'}, {'password': ''}):
+            self.assertEqual(self.login(**data).status_code, 400, data)
+        User.objects.filter(pk=self.user.pk).update(is_verified=False)
+        self.assertEqual(self.login().status_code, 400)
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        old_hash = make_password('Kuchli-Parol-2024', hasher='pbkdf2_sha1')
+        User.objects.filter(pk=self.user.pk).update(password=old_hash)
+        self.assertEqual(self.login(password='notogri').status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, old_hash)
+
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertTrue(self.user.check_password('Kuchli-Parol-2024'))
+
+    def test_full_hashing_pool_returns_503(self):
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        with mock.patch.object(hashing, '_slots', slots):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+        slots.release()
+        with mock.patch.object(hashing, '_slots', slots):
+            self.assertEqual(self.login().status_code, 200)
+        # The slot is handed back once the hash finishes
+        self.assertTrue(slots.acquire(blocking=False))
+
+
+
+class FollowSuggestionTests(TestCase):
+    expected = [('a', 'd', 2), ('a', 'e', 1), ('c', 'b', 2), ('d', 'e', 1)]
+
+    def setUp(self):
+        self.users = {
+            name: User.objects.create_user(email=f'{name}@example.com', username=name, password='x')
+            for name in 'abcdef'
+        }
+        edges = ['ab', 'ac', 'bd', 'be', 'cd', 'ca', 'db', 'fa', 'fb', 'fc', 'fd', 'fe']
+        Follow.objects.bulk_create(
+            Follow(follower=self.users[x], following=self.users[y].profile) for x, y in edges
+        )
+        # Left over from an earlier run; e follows nobody now
+        FollowSuggestion.objects.create(user=self.users['e'], suggested=self.users['a'].profile, score=9)
+
+    def stored(self):
+        return sorted(FollowSuggestion.objects.values_list('user__username', 'suggested__user__username', 'score'))
+
+    def compute(self, *args):
+        call_command('compute_follow_suggestions', *args, stdout=io.StringIO())
+        return self.stored()
+
+    def test_python_backend_scores_friends_of_friends(self):
+        self.assertEqual(self.compute('--no-scipy'), self.expected)
+        self.assertEqual(self.compute('--no-scipy', '--max-fanout=1'), [('c', 'b', 1)])
+        self.assertEqual(self.compute('--no-scipy', '--top-k=1', '--batch-size=1'),
+                         [('a', 'd', 2), ('c', 'b', 2), ('d', 'e', 1)])
+
+    @skipIf(suggestions.sparse is None, 'SciPy is not installed')
+    def test_scipy_backend_matches_python(self):
+        self.assertEqual(self.compute(), self.expected)
+        self.assertEqual(self.compute('--max-fanout=1'), [('c', 'b', 1)])
+
+        rng = random.Random(7)
+        pairs = sorted({(rng.randrange(1, 41), rng.randrange(1, 41)) for _ in range(300)})
+        src = array('q', [a for a, b in pairs if a != b])
+        dst = array('q', [b for a, b in pairs if a != b])
+        for top_k, max_fanout in ((3, 10), (20, 5000)):
+            python = dict(suggestions.top_k_python(src, dst, top_k, max_fanout))
+            scipy = dict(suggestions.top_k_scipy(src, dst, top_k, max_fanout, chunk_rows=7))
+            self.assertEqual(scipy, python)
+
+    def test_endpoint_skips_accounts_followed_since(self):
+        self.compute('--no-scipy')
+        client = APIClient()
+        client.force_authenticate(self.users['a'])
+        Follow.objects.create(follower=self.users['a'], following=self.users['d'].profile)
+        response = client.get(reverse('follow_suggestions'))
+        self.assertEqual([(row['profile']['user']['username'], row['score']) for row in response.json()['results']],
+                         [('e', 1)])
+
+
+class AsyncProfileDetailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.reader = User.objects.create_user(email='aziz@example.com', username='aziz', password='x')
+        Follow.objects.create(follower=self.reader, following=self.user.profile)
+        self.client = APIClient()
+
+    def assertSameResponse(self, username):
+        sync = self.client.get(reverse('profile_detail', kwargs={'username': username}))
+        response = self.client.get(reverse('profile_detail_async', kwargs={'username': username}))
+        self.assertEqual(response.status_code, sync.status_code, username)
+        self.assertEqual(response.json(), sync.json(), username)
+        return response.json()
+
+    def test_matches_the_sync_view(self):
+        self.assertFalse(self.assertSameResponse('olim')['is_following'])
+        self.assertSameResponse('yoq')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.reader).access_token}')
+        self.assertTrue(self.assertSameResponse('olim')['is_following'])
+        self.assertFalse(self.assertSameResponse('aziz')['is_following'])
+
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer notogri')
+        response = self.client.get(reverse('profile_detail_async', kwargs={'username': 'olim'}))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
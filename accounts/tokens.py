@@ -0,0 +1,136 @@
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing on one blake2b digest."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.capacity = capacity
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class BlacklistFilter:
+    """
+    Per-process Bloom filter of blacklisted refresh-token JTIs. A negative
+    answer skips the database; a positive one is confirmed with a query.
+
+    New blacklist rows are pulled incrementally (by id) whenever the shared
+    cache generation changes, and at least every BLACKLIST_BLOOM_SYNC_INTERVAL
+    seconds otherwise. Without a shared cache the interval defaults to 0, so
+    every check pulls rows added by other workers. The filter is rebuilt from
+    scratch when it fills up or after BLACKLIST_BLOOM_REBUILD_INTERVAL, which
+    drops entries removed by purge_blacklist.
+    """
+    generation_key = 'token-blacklist-generation'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._generation = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+        self.checks = 0
+        self.db_checks = 0
+        self.false_positives = 0
+
+    def _sync(self):
+        now = time.monotonic()
+        generation = cache.get(self.generation_key)
+        if (
+            self._bloom is not None
+            and generation == self._generation
+            and now - self._synced_at < settings.BLACKLIST_BLOOM_SYNC_INTERVAL
+        ):
+            return
+        with self._lock:
+            bloom, last_id = self._bloom, self._last_id
+            rebuild = (
+                bloom is None
+                or bloom.count >= bloom.capacity
+                or now - self._built_at > settings.BLACKLIST_BLOOM_REBUILD_INTERVAL
+            )
+            if rebuild:
+                # Built aside and swapped in when complete: readers outside the
+                # lock keep checking against the previous filter meanwhile
+                bloom, last_id = BloomFilter(settings.BLACKLIST_BLOOM_CAPACITY, settings.BLACKLIST_BLOOM_ERROR_RATE), 0
+            rows = BlacklistedToken.objects.filter(
+                id__gt=last_id, token__expires_at__gt=timezone.now()
+            ).order_by('id').values_list('id', 'token__jti')
+            for row_id, jti in rows.iterator(chunk_size=5000):
+                bloom.add(jti)
+                last_id = row_id
+            self._bloom, self._last_id = bloom, last_id
+            if rebuild:
+                self._built_at = now
+            self._generation = generation
+            self._synced_at = now
+
+    def is_blacklisted(self, jti):
+        self._sync()
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.db_checks += 1
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            return True
+        self.false_positives += 1
+        return False
+
+    def changed(self):
+        """Bump the shared generation so every worker (this one included) syncs on its next check."""
+        cache.set(self.generation_key, time.time_ns(), None)
+
+    def stats(self):
+        negatives = self.checks - (self.db_checks - self.false_positives)
+        return {
+            'checks': self.checks,
+            'db_checks': self.db_checks,
+            'false_positives': self.false_positives,
+            'false_positive_rate': self.false_positives / negatives if negatives else 0.0,
+            'entries': self._bloom.count if self._bloom else 0,
+            'size_bytes': len(self._bloom.bits) if self._bloom else 0,
+        }
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class RefreshToken(BaseRefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_filter.is_blacklisted(jti):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.changed()
+        return result
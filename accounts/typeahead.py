@@ -0,0 +1,206 @@
+"""
+In-process username prefix index for typeahead/mention autocomplete.
+
+Usernames are kept in one sorted array, so a prefix maps to a contiguous
+slice found with two binary searches; matches are ranked by follower count.
+Lookups never touch the database.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.db import connections
+from .models import Profile
+
+# Sorts after every character a username can contain
+_PREFIX_END = '\U0010ffff'
+
+
+class PrefixIndex:
+    """
+    Sorted (lowercase username, user id) keys plus the display name and
+    follower count of each user.
+
+    A prefix matching more than `scan_limit` keys is wide: its top
+    `max_results` are precomputed with each snapshot and updated in place
+    as users are added. Other prefixes rank at most `scan_limit` keys, so
+    a lookup only scans a wide slice again after a rename or removal under
+    that prefix.
+    """
+
+    def __init__(self, max_results, scan_limit):
+        self.max_results = max_results
+        self.scan_limit = scan_limit
+        self._keys = []
+        self._entries = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def replace(self, rows):
+        """Swap in a full snapshot of (user_id, username, followers_count) rows."""
+        entries = {user_id: (username, followers_count) for user_id, username, followers_count in rows}
+        keys = sorted((username.lower(), user_id) for user_id, (username, _count) in entries.items())
+        memo = self._wide_prefixes(keys, entries)
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self._memo = memo
+
+    def upsert(self, user_id, username, followers_count=None):
+        with self._lock:
+            old = self._entries.get(user_id)
+            if followers_count is None:
+                followers_count = old[1] if old else 0
+            if old is not None:
+                if old == (username, followers_count):
+                    return
+                self._remove_key(user_id, old[0])
+            self._entries[user_id] = (username, followers_count)
+            insort(self._keys, (username.lower(), user_id))
+            self._offer(user_id, username, followers_count)
+
+    def remove(self, user_id):
+        with self._lock:
+            old = self._entries.pop(user_id, None)
+            if old is not None:
+                self._remove_key(user_id, old[0])
+
+    def _remove_key(self, user_id, username):
+        key = (username.lower(), user_id)
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+        # The next-ranked user is unknown, so these are recomputed on demand
+        name = username.lower()
+        for length in range(1, len(name) + 1):
+            self._memo.pop(name[:length], None)
+
+    def _offer(self, user_id, username, followers_count):
+        """Merge a new entry into the precomputed results of its wide prefixes."""
+        name = username.lower()
+        item = (-followers_count, name, user_id)
+        for length in range(1, len(name) + 1):
+            cached = self._memo.get(name[:length])
+            if cached is None:
+                continue
+            ranked = [(-count, other.lower(), other_id) for other_id, other, count in cached]
+            insort(ranked, item)
+            self._memo[name[:length]] = [
+                (other_id, self._entries[other_id][0], -negative_count)
+                for negative_count, _name, other_id in ranked[:self.max_results]
+            ]
+
+    def _wide_prefixes(self, keys, entries):
+        """{prefix: top results} for every prefix matching more than scan_limit keys."""
+        memo = {}
+        pending = [('', 0, len(keys))]
+        while pending:
+            prefix, start, end = pending.pop()
+            if end - start <= self.scan_limit:
+                continue
+            if prefix:
+                memo[prefix] = self._rank(keys, entries, start, end, self.max_results)
+            # Split the slice by the next character
+            depth, index = len(prefix), start
+            while index < end:
+                name = keys[index][0]
+                if len(name) == depth:
+                    index += 1
+                    continue
+                child = name[:depth + 1]
+                child_end = bisect_left(keys, (child + _PREFIX_END,), index, end)
+                pending.append((child, index, child_end))
+                index = child_end
+        return memo
+
+    @staticmethod
+    def _rank(keys, entries, start, end, limit):
+        top = heapq.nsmallest(
+            limit,
+            ((-entries[user_id][1], name, user_id) for name, user_id in keys[start:end]),
+        )
+        return [(user_id, entries[user_id][0], -negative_count) for negative_count, _name, user_id in top]
+
+    def search(self, prefix, limit):
+        """Up to `limit` (user_id, username, followers_count) for usernames starting with `prefix`."""
+        prefix = prefix.lower()
+        limit = min(limit, self.max_results)
+        cached = self._memo.get(prefix)
+        if cached is not None:
+            return cached[:limit]
+
+        with self._lock:
+            keys, entries = self._keys, self._entries
+            start = bisect_left(keys, (prefix,))
+            end = bisect_left(keys, (prefix + _PREFIX_END,), start)
+            wide = end - start > self.scan_limit
+            results = self._rank(keys, entries, start, end, self.max_results if wide else limit)
+            if wide:
+                self._memo[prefix] = results
+        return results[:limit]
+
+
+class TypeaheadIndex:
+    """
+    Process-wide PrefixIndex of active users. Loaded by warm_up() or on
+    first use, kept
+    current by the User save/delete signals of this process, and reloaded in
+    a background thread every TYPEAHEAD_REFRESH_INTERVAL seconds to pick up
+    follower counts and other workers' writes.
+    """
+
+    def __init__(self):
+        self.index = PrefixIndex(settings.TYPEAHEAD_MAX_RESULTS, settings.TYPEAHEAD_SCAN_LIMIT)
+        self._loaded_at = None
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+    def _load(self):
+        rows = Profile.objects.filter(user__is_active=True) \
+            .values_list('user_id', 'user__username', 'followers_count')
+        self.index.replace(rows.iterator(chunk_size=5000))
+        self._loaded_at = time.monotonic()
+
+    def load(self):
+        with self._load_lock:
+            self._load()
+        return len(self.index)
+
+    def _refresh(self):
+        try:
+            self.load()
+        finally:
+            self._refreshing = False
+            connections.close_all()
+
+    def ensure_loaded(self):
+        if self._loaded_at is None:
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self._load()
+        elif time.monotonic() - self._loaded_at > settings.TYPEAHEAD_REFRESH_INTERVAL and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name='typeahead-refresh', daemon=True).start()
+
+    def search(self, prefix, limit=None):
+        self.ensure_loaded()
+        return self.index.search(prefix, limit or settings.TYPEAHEAD_MAX_RESULTS)
+
+    def user_saved(self, user_id, username, is_active):
+        if self._loaded_at is None:
+            return
+        if is_active:
+            self.index.upsert(user_id, username)
+        else:
+            self.index.remove(user_id)
+
+    def user_deleted(self, user_id):
+        if self._loaded_at is not None:
+            self.index.remove(user_id)
+
+
+typeahead_index = TypeaheadIndex()
@@ -1,20 +1,27 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from . import views
+from . import views, async_views
 
 
 urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('verify-email/', views.verify_email, name='verify_email'),
     path('login/', views.LoginView.as_view(), name='login'),
+    path('login/async/', async_views.login_async, name='login_async'),
     path('logout/', views.logout_view, name='logout'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/blacklist-stats/', views.token_blacklist_stats, name='token_blacklist_stats'),
     path('password-reset/', views.password_reset, name='password_reset'),
     path('password-reset/confirm/', views.password_reset_confirm, name='password_reset_confirm'),
 
     path('users/me/', views.CurrentUserView.as_view(), name='current_user'),
     path('profiles/me/', views.CurrentProfileView.as_view(), name='current_profile'),
+    path('profiles/me/suggestions/', views.FollowSuggestionListView.as_view(), name='follow_suggestions'),
+    path('profiles/typeahead/', views.profile_typeahead, name='profile_typeahead'),
+    path('profiles/bulk-follow/', views.bulk_follow, name='bulk_follow'),
+    path('profiles/bulk-unfollow/', views.bulk_unfollow, name='bulk_unfollow'),
     path('profiles/<str:username>/', views.ProfileDetailView.as_view(), name='profile_detail'),
+    path('profiles/<str:username>/async/', async_views.profile_detail_async, name='profile_detail_async'),
     path('profiles/<str:username>/follow/', views.follow_user, name='follow_user'),
     path('profiles/<str:username>/unfollow/', views.unfollow_user, name='unfollow_user'),
     path('profiles/<str:username>/followers/', views.FollowersListView.as_view(), name='followers'),
@@ -0,0 +1,46 @@
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from .models import User
+
+
+def _version_key(user_id):
+    return f'auth-user-version:{user_id}'
+
+
+def _user_key(user_id, version):
+    return f'auth-user:{user_id}:{version}'
+
+
+def get_cached_user(user_id):
+    """
+    Return the user (with its profile preloaded) for `user_id`, served from
+    the cache when possible. Entries are keyed by a per-user version, so a
+    concurrent reload can never resurrect data older than the last
+    invalidate_user() call. Returns None if the user does not exist.
+
+    Invalidation is only as wide as the cache backend, so AUTH_USER_CACHE_TTL
+    defaults to 0 (always read the database) unless the cache is shared.
+    """
+    if settings.AUTH_USER_CACHE_TTL <= 0:
+        return User.objects.select_related('profile').filter(pk=user_id).first()
+
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() keeps a version another worker may have set in the meantime
+        if not cache.add(_version_key(user_id), version, settings.AUTH_USER_CACHE_TTL * 10):
+            version = cache.get(_version_key(user_id), version)
+    else:
+        user = cache.get(_user_key(user_id, version))
+        if user is not None:
+            return user
+
+    user = User.objects.select_related('profile').filter(pk=user_id).first()
+    if user is not None:
+        cache.set(_user_key(user_id, version), user, settings.AUTH_USER_CACHE_TTL)
+    return user
+
+
+def invalidate_user(user_id):
+    cache.set(_version_key(user_id), uuid.uuid4().hex, settings.AUTH_USER_CACHE_TTL * 10)
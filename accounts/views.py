@@ -1,19 +1,24 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import User, Profile, Follow
+from .models import User, Profile, Follow, UserToken, FollowSuggestion
+from .tokens import RefreshToken, blacklist_filter
 from .serializers import (
     UserCreateSerializer, UserLoginSerializer, UserSerializer,
-    ProfileSerializer, ProfileUpdateSerializer, EmailVerificationSerializer,
+    ProfileSerializer, ProfileDetailSerializer, ProfileUpdateSerializer, EmailVerificationSerializer, FollowSuggestionSerializer,
+    BulkFollowSerializer,
     PasswordResetSerializer, PasswordResetConfirmSerializer
 )
 from .email_templates import get_password_reset_email, get_verification_email, get_welcome_email
+from .outbox import enqueue_email
+from .typeahead import typeahead_index
+from . import follow_graph
+from core.views import CompiledListMixin
 
 
 User = get_user_model()
@@ -29,21 +34,20 @@ class RegisterView(generics.CreateAPIView):
 
         if serializer.is_valid():
             user = serializer.save()
+            verification_token = user.generate_verification_token()
 
             try:
                 email_html = get_verification_email(
                     username=user.username,
-                    verification_token=user.verification_token,
+                    verification_token=verification_token,
                     site_url=settings.SITE_URL
                 )
 
-                send_mail(
+                enqueue_email(
                     subject='🎉 Zamka ga xush kelibsiz! Email ni tasdiqlang',
-                    message=f'Assalomu alaykum {user.username}! Email tasdiqlash tokeni: {user.verification_token}',
+                    message=f'Assalomu alaykum {user.username}! Email tasdiqlash tokeni: {verification_token}',
                     html_message=email_html,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=True,
+                    recipient=user.email,
                 )
             except Exception as e:
                 print(f"Email yuborishda xatolik: {e}")
@@ -51,7 +55,7 @@ class RegisterView(generics.CreateAPIView):
             return Response({
                 'message': 'Foydalanuvchi muvaffaqiyatli yaratildi. Email manzilingizni tasdiqlash uchun emailingizni tekshiring.',
                 'user': UserSerializer(user).data,
-                'verification_token': user.verification_token  # Development uchun
+                'verification_token': verification_token  # Development uchun
             }, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -86,39 +90,34 @@ def verify_email(request):
     if serializer.is_valid():
         token = serializer.validated_data['token']
 
-        try:
-            user = User.objects.get(verification_token=token)
+        user = UserToken.consume(token, UserToken.PURPOSE_VERIFY_EMAIL)
+        if user is None:
+            return Response({
+                'error': 'Noto\'g\'ri yoki eskirgan token.'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            if user.is_verified:
-                return Response({
-                    'message': 'Email manzil allaqachon tasdiqlangan.'
-                }, status=status.HTTP_200_OK)
+        if user.is_verified:
+            return Response({
+                'message': 'Email manzil allaqachon tasdiqlangan.'
+            }, status=status.HTTP_200_OK)
 
-            user.is_verified = True
-            user.verification_token = None
-            user.save()
+        user.is_verified = True
+        user.save(update_fields=['is_verified'])
 
-            try:
-                welcome_html = get_welcome_email(username=user.username)
-                send_mail(
-                    subject='🎊 Zamka oilasiga xush kelibsiz!',
-                    message=f'Tabriklaymiz {user.username}! Zamka ga muvaffaqiyatli qo\'shildingiz.',
-                    html_message=welcome_html,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=True,
-                )
-            except Exception as e:
-                print(f"Welcome email yuborishda xatolik: {e}")
-
-            return Response({
-                'message': 'Email manzil muvaffaqiyatli tasdiqlandi. Endi Zamka ga kirishingiz mumkin!'
-            })
+        try:
+            welcome_html = get_welcome_email(username=user.username)
+            enqueue_email(
+                subject='🎊 Zamka oilasiga xush kelibsiz!',
+                message=f'Tabriklaymiz {user.username}! Zamka ga muvaffaqiyatli qo\'shildingiz.',
+                html_message=welcome_html,
+                recipient=user.email,
+            )
+        except Exception as e:
+            print(f"Welcome email yuborishda xatolik: {e}")
 
-        except User.DoesNotExist:
-            return Response({
-                'error': 'Noto\'g\'ri yoki eskirgan token.'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': 'Email manzil muvaffaqiyatli tasdiqlandi. Endi Zamka ga kirishingiz mumkin!'
+        })
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -145,6 +144,13 @@ def logout_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def token_blacklist_stats(request):
+    """Blacklist Bloom-filter counters of the worker serving this request."""
+    return Response(blacklist_filter.stats())
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def password_reset(request):
@@ -163,13 +169,11 @@ def password_reset(request):
                 site_url=settings.SITE_URL
             )
 
-            send_mail(
+            enqueue_email(
                 subject='🔐 Zamka - Parolni tiklash',
                 message=f'Assalomu alaykum {user.username}! Parol tiklash tokeni: {reset_token}',
                 html_message=email_html,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                fail_silently=True,
+                recipient=user.email,
             )
 
         except User.DoesNotExist:
@@ -191,21 +195,19 @@ def password_reset_confirm(request):
         token = serializer.validated_data['token']
         password = serializer.validated_data['password']
 
-        try:
-            user = User.objects.get(reset_token=token)
-            user.set_password(password)
-            user.reset_token = None
-            user.save()
-
-            return Response({
-                'message': 'Parol muvaffaqiyatli o\'zgartirildi. Endi yangi parol bilan Zamka ga kirishingiz mumkin!'
-            })
-
-        except User.DoesNotExist:
+        user = UserToken.consume(token, UserToken.PURPOSE_PASSWORD_RESET)
+        if user is None:
             return Response({
                 'error': 'Noto\'g\'ri yoki eskirgan token.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        user.set_password(password)
+        user.save(update_fields=['password'])
+
+        return Response({
+            'message': 'Parol muvaffaqiyatli o\'zgartirildi. Endi yangi parol bilan Zamka ga kirishingiz mumkin!'
+        })
+
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -218,10 +220,10 @@ class CurrentUserView(generics.RetrieveAPIView):
 
 
 class ProfileDetailView(generics.RetrieveAPIView):
-    serializer_class = ProfileSerializer
+    serializer_class = ProfileDetailSerializer
     lookup_field = 'user__username'
     lookup_url_kwarg = 'username'
-    queryset = Profile.objects.all()
+    queryset = Profile.objects.select_related('user')
     permission_classes = [permissions.AllowAny]
 
 
@@ -238,6 +240,17 @@ class CurrentProfileView(generics.RetrieveUpdateAPIView):
         return ProfileSerializer
 
 
+class FollowSuggestionListView(CompiledListMixin, generics.ListAPIView):
+    serializer_class = FollowSuggestionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # Precomputed by compute_follow_suggestions; skip accounts followed since
+        return FollowSuggestion.objects.filter(user=self.request.user) \
+            .exclude(suggested__followers__follower=self.request.user) \
+            .select_related('suggested__user')
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def follow_user(request, username):
@@ -248,16 +261,22 @@ def follow_user(request, username):
             'error': 'O\'zingizni kuzata olmaysiz.'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    follow, created = Follow.objects.get_or_create(
-        follower=request.user,
-        following=target_user.profile
-    )
+    # The database decides under the follower lock; the adjacency cache
+    # only sees this worker's writes, so it is not consulted here
+    with transaction.atomic():
+        follow_graph.lock_follower(request.user)
+        follow, created = Follow.objects.get_or_create(
+            follower=request.user,
+            following=target_user.profile
+        )
 
     if not created:
         return Response({
             'error': 'Siz allaqachon bu foydalanuvchini kuzatyapsiz.'
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    # Counters were bumped in the database by the Follow signal
+    target_user.profile.refresh_from_db(fields=['followers_count', 'following_count'])
     return Response({
         'message': f'{target_user.username} muvaffaqiyatli kuzatildi.',
         'profile': ProfileSerializer(target_user.profile).data
@@ -275,8 +294,11 @@ def unfollow_user(request, username):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        follow = Follow.objects.get(follower=request.user, following=target_user.profile)
-        follow.delete()
+        with transaction.atomic():
+            follow_graph.lock_follower(request.user)
+            follow = Follow.objects.get(follower=request.user, following=target_user.profile)
+            follow.delete()
+        target_user.profile.refresh_from_db(fields=['followers_count', 'following_count'])
         return Response({
             'message': f'{target_user.username} kuzatishdan chiqarildi.',
             'profile': ProfileSerializer(target_user.profile).data
@@ -287,23 +309,67 @@ def unfollow_user(request, username):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class FollowersListView(generics.ListAPIView):
+def _bulk_follow_response(request, action):
+    serializer = BulkFollowSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    results = action(request.user, serializer.validated_data['usernames'])
+    following_count = Profile.objects.filter(user=request.user) \
+        .values_list('following_count', flat=True).first()
+    return Response({
+        'results': [{'username': name, 'status': result} for name, result in results.items()],
+        'following_count': following_count,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_follow(request):
+    return _bulk_follow_response(request, follow_graph.bulk_follow)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_unfollow(request):
+    return _bulk_follow_response(request, follow_graph.bulk_unfollow)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def profile_typeahead(request):
+    """Usernames starting with ?q= (a leading @ is ignored), most-followed first; served from memory."""
+    query = request.GET.get('q', '').strip().lstrip('@')
+    try:
+        limit = int(request.GET.get('limit', settings.TYPEAHEAD_MAX_RESULTS))
+    except ValueError:
+        limit = settings.TYPEAHEAD_MAX_RESULTS
+    if not query or limit < 1:
+        return Response({'results': []})
+    return Response({
+        'results': [
+            {'id': user_id, 'username': username, 'followers_count': followers_count}
+            for user_id, username, followers_count in typeahead_index.search(query, limit)
+        ]
+    })
+
+
+class FollowersListView(CompiledListMixin, generics.ListAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
-        username = self.kwargs['username']
-        user = get_object_or_404(User, username=username)
-        follower_ids = Follow.objects.filter(following=user.profile).values_list('follower', flat=True)
-        return Profile.objects.filter(user__id__in=follower_ids)
+        profile = get_object_or_404(Profile, user__username=self.kwargs['username'])
+        return Profile.objects.filter(user__following__following=profile) \
+            .select_related('user').order_by('-user__following__created_at')
 
 
-class FollowingListView(generics.ListAPIView):
+class FollowingListView(CompiledListMixin, generics.ListAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
-        username = self.kwargs['username']
-        user = get_object_or_404(User, username=username)
-        following_ids = Follow.objects.filter(follower=user).values_list('following', flat=True)
-        return Profile.objects.filter(id__in=following_ids)
+        user = get_object_or_404(User, username=self.kwargs['username'])
+        return Profile.objects.filter(followers__follower=user) \
+            .select_related('user').order_by('-followers__created_at')
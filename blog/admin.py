@@ -1,20 +1,33 @@
 from django.contrib import admin
+from core.admin import LargeTableAdminMixin
 from .models import Post, Comment, Like, Notification
+from .queries import comments_total, likes_total
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'author', 'created_at', 'is_active', 'likes_count', 'comments_count']
     list_filter = ['is_active', 'created_at', 'author']
     search_fields = ['title', 'content', 'author__username']
     readonly_fields = ['created_at', 'updated_at']
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('author')
+        return super().get_queryset(request).select_related('author').annotate(
+            likes_total=likes_total(Post),
+            comments_total=comments_total(),
+        )
+
+    @admin.display(description='Likes count', ordering='likes_total')
+    def likes_count(self, obj):
+        return obj.likes_total
+
+    @admin.display(description='Comments count', ordering='comments_total')
+    def comments_count(self, obj):
+        return obj.comments_total
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['content_preview', 'author', 'post', 'created_at', 'is_active', 'likes_count']
     list_filter = ['is_active', 'created_at', 'author']
     search_fields = ['content', 'author__username', 'post__title']
@@ -26,19 +39,26 @@ class CommentAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('author', 'post')
+        return super().get_queryset(request).select_related('author', 'post').annotate(
+            likes_total=likes_total(Comment),
+        )
+
+    @admin.display(description='Likes count', ordering='likes_total')
+    def likes_count(self, obj):
+        return obj.likes_total
 
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'content_type', 'object_id', 'created_at']
     list_filter = ['content_type', 'created_at']
+    list_select_related = ['user', 'content_type']
     search_fields = ['user__username']
     readonly_fields = ['created_at']
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['recipient', 'actor', 'verb', 'target_type', 'is_read', 'created_at']
     list_filter = ['verb', 'target_type', 'is_read', 'created_at']
     search_fields = ['recipient__username', 'actor__username']
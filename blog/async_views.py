@@ -0,0 +1,155 @@
+"""
+Async counterparts of the hot read endpoints for the ASGI deployment.
+
+Rows come from the async ORM with their like/comment counts annotated and
+relations joined, so the DRF read serializers render them without touching
+the database from the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from accounts.authentication import CachedJWTAuthentication
+from core.renderers import FastJsonResponse
+from core.serializers import compile_serializer
+from .models import Post, Comment, Notification
+from .serializers import PostReadSerializer, CommentReadSerializer, NotificationSerializer
+from .queries import comments_total, likes_total
+from .view_counter import post_views
+
+POST_ORDERING_FIELDS = {'created_at': 'created_at', 'title': 'title', 'likes_count': 'likes_total'}
+COMMENT_ORDERING_FIELDS = {'created_at': 'created_at', 'likes_count': 'likes_total'}
+
+_authentication = CachedJWTAuthentication()
+
+
+def _error(detail, status):
+    return FastJsonResponse({'detail': detail}, status=status)
+
+
+def _method_not_allowed(request):
+    return _error(f'Method "{request.method}" not allowed.', 405)
+
+
+async def _authenticate(request):
+    """Resolve the JWT user like the DRF views do; returns None for anonymous requests."""
+    result = await sync_to_async(_authentication.authenticate)(request)
+    return result[0] if result else None
+
+
+async def _annotated_posts():
+    return Post.objects.select_related('author').annotate(
+        likes_total=await sync_to_async(likes_total)(Post),
+        comments_total=comments_total(),
+    )
+
+
+def _ordering(request, allowed, default):
+    """Validated ?ordering= terms (OrderingFilter semantics), mapped to annotation names."""
+    terms = []
+    for term in request.GET.get('ordering', '').split(','):
+        term = term.strip()
+        field = allowed.get(term.lstrip('-'))
+        if field:
+            terms.append(('-' if term.startswith('-') else '') + field)
+    return terms or default
+
+
+async def _paginate(request, queryset, serializer_class, prepare=None):
+    """PageNumberPagination's response shape built with acount() and one sliced fetch."""
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+    count = await queryset.acount()
+    last_page = max((count + page_size - 1) // page_size, 1)
+    if not 1 <= page <= last_page:
+        return _error('Invalid page.', 404)
+
+    offset = (page - 1) * page_size
+    rows = [row async for row in queryset[offset:offset + page_size]]
+    if prepare:
+        prepare(rows)
+
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    return FastJsonResponse({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if page < last_page else None,
+        'previous': previous,
+        'results': compile_serializer(serializer_class).many(rows, {'request': request}),
+    })
+
+
+async def post_list_async(request):
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    queryset = (await _annotated_posts()).filter(is_active=True)
+    author = request.GET.get('author__username')
+    if author:
+        queryset = queryset.filter(author__username=author)
+    for term in request.GET.get('search', '').replace(',', ' ').split():
+        queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    queryset = queryset.order_by(*_ordering(request, POST_ORDERING_FIELDS, ['-created_at']))
+
+    return await _paginate(request, queryset, PostReadSerializer)
+
+
+async def post_detail_async(request, pk):
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    try:
+        post = await (await _annotated_posts()).aget(pk=pk, is_active=True)
+    except Post.DoesNotExist:
+        return _error('Not found.', 404)
+    post_views.record(post.pk)
+    return FastJsonResponse(compile_serializer(PostReadSerializer).to_representation(post, {'request': request}))
+
+
+async def comment_list_async(request, post_id):
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    # Every comment nests the same post: fetch it once instead of joining it per row
+    post = await (await _annotated_posts()).filter(pk=post_id).afirst()
+    queryset = Comment.objects.filter(post_id=post_id, is_active=True).select_related('author').annotate(
+        likes_total=await sync_to_async(likes_total)(Comment),
+    ).order_by(*_ordering(request, COMMENT_ORDERING_FIELDS, ['-created_at']))
+
+    def attach_post(comments):
+        for comment in comments:
+            comment.post = post
+
+    return await _paginate(request, queryset, CommentReadSerializer, prepare=attach_post)
+
+
+async def notification_list_async(request):
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    try:
+        user = await _authenticate(request)
+    except exceptions.APIException as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        return FastJsonResponse(detail, status=exc.status_code)
+    if user is None:
+        response = _error('Authentication credentials were not provided.', 401)
+        response['WWW-Authenticate'] = _authentication.authenticate_header(request)
+        return response
+
+    queryset = Notification.objects.filter(recipient=user).select_related('actor')
+    is_read = request.GET.get('is_read', '').lower()
+    if is_read in ('true', 'false', '1', '0'):
+        queryset = queryset.filter(is_read=is_read in ('true', '1'))
+
+    def attach_recipient(notifications):
+        for notification in notifications:
+            notification.recipient = user
+
+    return await _paginate(request, queryset, NotificationSerializer, prepare=attach_recipient)
@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from blog.rollups import rebuild_author_rollups, update_author_rollups
+
+
+class Command(BaseCommand):
+    help = "Fold posts, comments, likes and follows created since the last run into the daily author rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Source rows folded per transaction")
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Recount everything from scratch, e.g. to drop deleted likes and follows")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        run = rebuild_author_rollups if options['rebuild'] else update_author_rollups
+        processed = run(options['batch_size'])
+        summary = ', '.join(f"{source}: {rows}" for source, rows in processed.items())
+        self.stdout.write(f"Rolled up {summary} new rows in {time.perf_counter() - start:.1f}s.")
@@ -13,6 +13,8 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Written in batches by blog.view_counter, so it trails live traffic slightly
+    views_count = models.PositiveIntegerField(default=0)
     likes = GenericRelation('Like', related_query_name='post')
 
     class Meta:
@@ -91,3 +93,30 @@ class Notification(models.Model):
 
     def __str__(self):
         return f'{self.actor.username} {self.verb} - {self.recipient.username}'
+
+
+class AuthorDailyStats(models.Model):
+    """Per-author, per-day counters written incrementally by blog.rollups."""
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    posts = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+    comments_received = models.PositiveIntegerField(default=0)
+    followers_gained = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+        unique_together = ('author', 'day')
+
+    def __str__(self):
+        return f'{self.author.username} {self.day}'
+
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into AuthorDailyStats, per source table."""
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source} @ {self.last_id}'
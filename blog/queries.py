@@ -0,0 +1,16 @@
+"""Count annotations shared by the API views, the async views and the admin."""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import OuterRef
+from core.db import count_subquery
+from .models import Comment, Like
+
+
+def likes_total(model):
+    """Correlated like count for `model` rows, for annotate(likes_total=...)."""
+    content_type = ContentType.objects.get_for_model(model)
+    return count_subquery(Like.objects.filter(content_type=content_type, object_id=OuterRef('pk')), 'object_id')
+
+
+def comments_total():
+    """Correlated count of a post's active comments, for annotate(comments_total=...)."""
+    return count_subquery(Comment.objects.filter(post=OuterRef('pk'), is_active=True), 'post')
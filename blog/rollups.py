@@ -0,0 +1,111 @@
+"""
+Daily per-author rollups for the stats endpoint.
+
+Each source table (posts, comments, likes, follows) has a RollupWatermark
+holding the highest id already counted. update_author_rollups() only reads
+rows above it, groups them by (author, day) and adds the counts to
+AuthorDailyStats, moving the watermark in the same transaction. Posts and
+comments that are soft-deleted (is_active=False) when their rows are read
+are skipped, as are likes and comments on them. Rows are otherwise counted
+when created: unlikes, unfollows and later deletions are not subtracted
+until the rollups are rebuilt.
+"""
+from collections import defaultdict
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from accounts.models import Follow
+from .models import AuthorDailyStats, Comment, Like, Post, RollupWatermark
+
+COUNTERS = ('posts', 'likes_received', 'comments_received', 'followers_gained')
+
+
+def _sources():
+    """(watermark name, [(queryset, author lookup, counter)]) per source table."""
+    post_type = ContentType.objects.get_for_model(Post)
+    comment_type = ContentType.objects.get_for_model(Comment)
+    return [
+        ('post', [(Post.objects.filter(is_active=True), 'author', 'posts')]),
+        # Authors commenting on or liking their own content do not count, nor
+        # does anything on soft-deleted posts and comments
+        ('comment', [
+            (Comment.objects.filter(is_active=True, post__is_active=True).exclude(author=F('post__author')),
+             'post__author', 'comments_received'),
+        ]),
+        ('like', [
+            (Like.objects.filter(content_type=post_type, post__is_active=True).exclude(user=F('post__author')),
+             'post__author', 'likes_received'),
+            (Like.objects.filter(content_type=comment_type, comment__is_active=True)
+             .exclude(user=F('comment__author')),
+             'comment__author', 'likes_received'),
+        ]),
+        ('follow', [(Follow.objects.all(), 'following__user', 'followers_gained')]),
+    ]
+
+
+def _apply(increments):
+    """Add {(author_id, day): {counter: n}} to AuthorDailyStats."""
+    if not increments:
+        return
+    author_ids = {author_id for author_id, _day in increments}
+    days = {day for _author_id, day in increments}
+    existing = {
+        (row.author_id, row.day): row
+        for row in AuthorDailyStats.objects.filter(author_id__in=author_ids, day__in=days)
+    }
+    created, updated = [], []
+    for key, counts in increments.items():
+        row = existing.get(key)
+        if row is None:
+            created.append(AuthorDailyStats(author_id=key[0], day=key[1], **counts))
+            continue
+        for counter, value in counts.items():
+            setattr(row, counter, getattr(row, counter) + value)
+        updated.append(row)
+    AuthorDailyStats.objects.bulk_create(created)
+    AuthorDailyStats.objects.bulk_update(updated, COUNTERS)
+
+
+def _roll_up_batch(name, parts, batch_size):
+    """Fold the next `batch_size` ids of one source; returns the number of source rows read."""
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(source=name)
+        model = parts[0][0].model
+        ids = list(model.objects.filter(pk__gt=watermark.last_id).order_by('pk')
+                   .values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 0
+
+        high = ids[-1]
+        increments = defaultdict(lambda: defaultdict(int))
+        for queryset, author, counter in parts:
+            grouped = queryset.filter(pk__gt=watermark.last_id, pk__lte=high) \
+                .annotate(day=TruncDate('created_at')) \
+                .values(author, 'day').annotate(total=Count('pk')).order_by()
+            for row in grouped:
+                increments[(row[author], row['day'])][counter] += row['total']
+        _apply(increments)
+        watermark.last_id = high
+        watermark.save(update_fields=['last_id', 'updated_at'])
+    return len(ids)
+
+
+def update_author_rollups(batch_size=5000):
+    """Bring every rollup source up to date; returns {source: rows read}."""
+    processed = {}
+    for name, parts in _sources():
+        total = read = _roll_up_batch(name, parts, batch_size)
+        while read == batch_size:
+            read = _roll_up_batch(name, parts, batch_size)
+            total += read
+        processed[name] = total
+    return processed
+
+
+def rebuild_author_rollups(batch_size=5000):
+    """Drop all rollups and watermarks and recount from scratch."""
+    with transaction.atomic():
+        AuthorDailyStats.objects.all().delete()
+        RollupWatermark.objects.all().delete()
+    return update_author_rollups(batch_size)
@@ -11,8 +11,8 @@ class PostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = ['id', 'title', 'content', 'author', 'created_at', 'updated_at', 'is_active', 'likes_count',
-                  'comments_count']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'is_active']
+                  'comments_count', 'views_count']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'is_active', 'views_count']
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
@@ -77,3 +77,23 @@ class NotificationSerializer(serializers.ModelSerializer):
         model = Notification
         fields = ['id', 'recipient', 'actor', 'verb', 'target_type', 'target_id', 'is_read', 'created_at']
         read_only_fields = ['id', 'recipient', 'actor', 'verb', 'target_type', 'target_id', 'created_at']
+
+
+class PostReadSerializer(PostSerializer):
+    """PostSerializer for rows annotated with likes_total/comments_total (no per-row COUNTs)."""
+    likes_count = serializers.IntegerField(source='likes_total', read_only=True)
+    comments_count = serializers.IntegerField(source='comments_total', read_only=True)
+
+
+class CommentReadSerializer(CommentSerializer):
+    """CommentSerializer for rows annotated with likes_total whose post carries PostReadSerializer annotations."""
+    post = PostReadSerializer(read_only=True)
+    likes_count = serializers.IntegerField(source='likes_total', read_only=True)
+
+
+class PostCommentReadSerializer(CommentReadSerializer):
+    """CommentReadSerializer for comments embedded in their own post: the post is not repeated."""
+    post = None
+
+    class Meta(CommentReadSerializer.Meta):
+        fields = ['id', 'content', 'author', 'created_at', 'updated_at', 'is_active', 'likes_count']
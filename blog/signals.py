@@ -2,6 +2,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Like, Notification
 from accounts.models import Follow
+from accounts.follow_graph import follows_bulk_created
 
 
 @receiver(post_save, sender=Follow)
@@ -14,3 +15,17 @@ def create_follow_notification(sender, instance, created, **kwargs):
             target_type='profile',
             target_id=instance.following.id
         )
+
+
+@receiver(follows_bulk_created, sender=Follow)
+def create_bulk_follow_notifications(sender, follower, targets, **kwargs):
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=user_id,
+            actor=follower,
+            verb='followed',
+            target_type='profile',
+            target_id=profile_id
+        )
+        for profile_id, user_id in targets
+    ])
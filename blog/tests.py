@@ -1,3 +1,335 @@
+from unittest import mock
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import Follow, User
+from . import view_counter
+from .models import Comment, Like, Notification, Post
+from .rollups import rebuild_author_rollups, update_author_rollups
+from .view_counter import ViewCounterBuffer, post_views
 
-# Create your tests here.
+
+class PostIncludeCommentsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.post = Post.objects.create(title='Sarlavha', content='Matn', author=self.user)
+        Comment.objects.bulk_create(
+            Comment(content=f'Izoh {i}', author=self.user, post=self.post) for i in range(12)
+        )
+        self.client = APIClient()
+        # Views stay in the buffer; the background flush thread is not started
+        patcher = mock.patch.object(ViewCounterBuffer, '_start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(post_views.flush)
+
+    def test_first_comment_page_in_fixed_queries(self):
+        url = reverse('post_detail', kwargs={'pk': self.post.pk}) + '?include=comments'
+        self.client.get(url)  # warms the ContentType cache
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        comments = response.json()['comments']
+        self.assertEqual(comments['count'], 12)
+        self.assertEqual(len(comments['results']), 10)
+        self.assertTrue(comments['next'].endswith(f'/posts/{self.post.pk}/comments/?page=2'))
+        self.assertNotIn('post', comments['results'][0])
+        self.assertEqual(response.json()['comments_count'], 12)
+
+    def test_sync_and_async_like_counts_agree(self):
+        reader = User.objects.create_user(email='aziz@example.com', username='aziz', password='x')
+        Like.objects.create(user=reader, content_type=ContentType.objects.get_for_model(Post), object_id=self.post.pk)
+        url = reverse('post_detail', kwargs={'pk': self.post.pk}) + '?include=comments'
+        self.assertEqual(self.client.get(url).json()['likes_count'], 1)
+        response = self.client.get(reverse('post_list_async'))
+        self.assertEqual(response.json()['results'][0]['likes_count'], 1)
+
+
+class PostListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.reader = User.objects.create_user(email='aziz@example.com', username='aziz', password='x')
+        self.posts = [Post.objects.create(title=f'Post {i}', content='Matn', author=self.user) for i in range(12)]
+        post_type = ContentType.objects.get_for_model(Post)
+        for user in (self.user, self.reader):
+            Like.objects.create(user=user, content_type=post_type, object_id=self.posts[3].pk)
+        Like.objects.create(user=self.reader, content_type=post_type, object_id=self.posts[7].pk)
+        self.comments = [
+            Comment.objects.create(content=f'Izoh {i}', author=self.reader, post=self.posts[0]) for i in range(12)
+        ]
+        Like.objects.create(user=self.user, content_type=ContentType.objects.get_for_model(Comment),
+                            object_id=self.comments[5].pk)
+        self.client = APIClient()
+
+    def test_post_page_runs_fixed_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('post_list_create'))
+        results = response.json()['results']
+        self.assertEqual(len(results), 10)
+        counts = {post['id']: (post['likes_count'], post['comments_count']) for post in results}
+        self.assertEqual(counts[self.posts[3].pk], (2, 0))
+        self.assertEqual(counts[self.posts[7].pk], (1, 0))
+
+    def test_posts_order_by_likes_count(self):
+        response = self.client.get(reverse('post_list_create'), {'ordering': '-likes_count'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.json()['results'][:2]], [self.posts[3].pk, self.posts[7].pk])
+        self.assertEqual(self.client.get(reverse('post_list_create'), {'ordering': 'views'}).status_code, 200)
+
+    def test_comment_page_runs_fixed_queries(self):
+        url = reverse('comment_list_create', kwargs={'post_id': self.posts[0].pk})
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'ordering': '-likes_count'})
+        results = response.json()['results']
+        self.assertEqual(len(results), 10)
+        self.assertEqual((results[0]['id'], results[0]['likes_count']), (self.comments[5].pk, 1))
+        self.assertEqual(results[0]['post']['comments_count'], 12)
+
+    def test_sync_and_async_lists_match(self):
+        for sync_name, async_name, kwargs in (
+            ('post_list_create', 'post_list_async', {}),
+            ('comment_list_create', 'comment_list_async', {'post_id': self.posts[0].pk}),
+        ):
+            sync = self.client.get(reverse(sync_name, kwargs=kwargs), {'ordering': '-likes_count'}).json()
+            response = self.client.get(reverse(async_name, kwargs=kwargs), {'ordering': '-likes_count'})
+            self.assertEqual(response.json()['results'], sync['results'])
+            self.assertEqual(response.json()['count'], sync['count'])
+
+
+class PostViewCounterTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ViewCounterBuffer, '_start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.post_views = ViewCounterBuffer()
+        patcher = mock.patch('blog.views.post_views', self.post_views)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.posts = [Post.objects.create(title=f'Post {i}', content='Matn', author=self.user) for i in range(3)]
+
+    def test_views_are_buffered_until_flush(self):
+        client = APIClient()
+        for _ in range(3):
+            client.get(reverse('post_detail', kwargs={'pk': self.posts[0].pk}))
+        client.get(reverse('post_detail', kwargs={'pk': self.posts[1].pk}))
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views_count, 0)
+        self.assertEqual(self.post_views.stats()['pending_views'], 4)
+        self.assertIsNone(self.post_views._thread)
+
+        self.assertEqual(self.post_views.flush(), 4)
+        counts = dict(self.user.posts.values_list('pk', 'views_count'))
+        self.assertEqual(counts, {self.posts[0].pk: 3, self.posts[1].pk: 1, self.posts[2].pk: 0})
+        self.assertEqual(self.post_views.lag(), 0.0)
+
+    def test_flush_statements_stay_within_the_parameter_limit(self):
+        posts = Post.objects.bulk_create(
+            Post(title=f'Post {i}', content='Matn', author=self.user) for i in range(400)
+        )
+        # Worst case: every post has its own increment, so its own WHEN branch
+        for views, post in enumerate(posts, start=1):
+            self.post_views._pending[post.pk] = views
+        bound = []
+
+        def record_params(execute, sql, params, many, context):
+            bound.append(len(params or ()))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record_params):
+            self.assertEqual(self.post_views.flush(), sum(range(1, 401)))
+        self.assertLessEqual(max(bound), connection.features.max_query_params or max(bound))
+        self.assertEqual(
+            dict(Post.objects.filter(pk__in=[post.pk for post in posts]).values_list('pk', 'views_count')),
+            {post.pk: views for views, post in enumerate(posts, start=1)},
+        )
+
+    def test_failed_chunk_rolls_back_the_whole_flush(self):
+        for post, views in zip(self.posts, (1, 2, 3)):
+            for _ in range(views):
+                self.post_views.record(post.pk)
+        update = QuerySet.update
+        calls = []
+
+        def fail_on_second_chunk(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise RuntimeError("database went away")
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(view_counter, 'FLUSH_CHUNK_SIZE', 1), \
+                mock.patch.object(QuerySet, 'update', fail_on_second_chunk), \
+                self.assertLogs('blog.view_counter', 'ERROR'):
+            self.assertEqual(self.post_views.flush(), 0)
+        self.assertEqual(sum(self.user.posts.values_list('views_count', flat=True)), 0)
+        self.assertEqual(self.post_views.stats()['pending_views'], 6)
+
+        self.assertEqual(self.post_views.flush(), 6)
+        counts = dict(self.user.posts.values_list('pk', 'views_count'))
+        self.assertEqual(counts, {self.posts[0].pk: 1, self.posts[1].pk: 2, self.posts[2].pk: 3})
+
+
+class AuthorRollupTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.reader = User.objects.create_user(email='aziz@example.com', username='aziz', password='x')
+        self.post = Post.objects.create(title='Sarlavha', content='Matn', author=self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def stats(self):
+        return self.client.get(reverse('author_stats', kwargs={'username': 'olim'})).json()['totals']
+
+    def like(self, target):
+        return Like.objects.create(user=self.reader, content_type=ContentType.objects.get_for_model(target),
+                                   object_id=target.pk)
+
+    def test_rollups_are_incremental(self):
+        Comment.objects.create(content='Zo\'r', author=self.reader, post=self.post)
+        Comment.objects.create(content='Rahmat', author=self.author, post=self.post)
+        self.like(self.post)
+        Follow.objects.create(follower=self.reader, following=self.author.profile)
+        update_author_rollups()
+        self.assertEqual(self.stats(), {'posts': 1, 'likes_received': 1, 'comments_received': 1, 'followers_gained': 1})
+
+        Comment.objects.create(content='Yana', author=self.reader, post=self.post)
+        self.assertEqual(update_author_rollups(), {'post': 0, 'comment': 1, 'like': 0, 'follow': 0})
+        with self.assertNumQueries(3):
+            self.assertEqual(self.stats()['comments_received'], 2)
+
+    def test_rebuild_skips_soft_deleted_rows(self):
+        Comment.objects.create(content='Rahmat', author=self.reader, post=self.post)
+        removed = Comment.objects.create(content='Spam', author=self.reader, post=self.post)
+        own = Comment.objects.create(content='Javob', author=self.author, post=self.post)
+        self.like(own)
+        hidden = Post.objects.create(title='Qoralama', content='Matn', author=self.author)
+        Comment.objects.create(content='Yashirin', author=self.reader, post=hidden)
+        self.like(hidden)
+        update_author_rollups()
+        self.assertEqual(self.stats(), {'posts': 2, 'likes_received': 2, 'comments_received': 3, 'followers_gained': 0})
+
+        Comment.objects.filter(pk__in=[removed.pk, own.pk]).update(is_active=False)
+        Post.objects.filter(pk=hidden.pk).update(is_active=False)
+        rebuild_author_rollups()
+        self.assertEqual(self.stats(), {'posts': 1, 'likes_received': 0, 'comments_received': 1, 'followers_gained': 0})
+
+    def test_malformed_dates_are_rejected(self):
+        url = reverse('author_stats', kwargs={'username': 'olim'})
+        for params in ({'from': 'abc'}, {'to': '2024-02-30'}, {'from': ''}, {'from': '2024-03-01', 'to': '2024-02-01'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+        self.assertEqual(self.client.get(url, {'from': '2024-01-01', 'to': '2024-01-31'}).status_code, 200)
+
+    def test_only_owner_sees_stats(self):
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('author_stats', kwargs={'username': 'olim'}))
+        self.assertEqual(response.status_code, 403)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='x')
+        self.reader = User.objects.create_user(email='aziz@example.com', username='aziz', password='x')
+        self.post = Post.objects.create(title='Sarlavha', content='Matn', author=self.admin)
+        self.comment = Comment.objects.create(content='Izoh', author=self.reader, post=self.post)
+        for target in (self.post, self.comment):
+            Like.objects.create(user=self.reader, content_type=ContentType.objects.get_for_model(target),
+                                object_id=target.pk)
+        self.client.force_login(self.admin)
+
+    def changelist(self, model, **params):
+        return self.client.get(reverse(f'admin:blog_{model}_changelist'), params)
+
+    def test_counts_come_from_annotations(self):
+        for i in range(5):
+            Comment.objects.create(content=f'Izoh {i}', author=self.reader, post=self.post)
+        response = self.changelist('post')
+        row = response.context['cl'].result_list[0]
+        self.assertEqual((row.likes_total, row.comments_total), (1, 6))
+
+        with CaptureQueriesContext(connection) as few:
+            self.changelist('comment')
+        Comment.objects.bulk_create(
+            Comment(content=f'Yana {i}', author=self.reader, post=self.post) for i in range(10)
+        )
+        with CaptureQueriesContext(connection) as many:
+            response = self.changelist('comment')
+        self.assertEqual(len(few), len(many))
+        likes = {row.pk: row.likes_total for row in response.context['cl'].result_list}
+        self.assertEqual(likes[self.comment.pk], 1)
+
+    def test_annotated_columns_are_sortable(self):
+        Post.objects.create(title='Bo\'sh', content='Matn', author=self.admin)
+        response = self.changelist('post', o='5')
+        self.assertEqual([row.likes_total for row in response.context['cl'].result_list], [0, 1])
+        response = self.changelist('post', o='-5')
+        self.assertEqual([row.likes_total for row in response.context['cl'].result_list], [1, 0])
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.reader = User.objects.create_user(email='aziz@example.com', username='aziz', password='x')
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', content='Toshkent' if i % 3 else 'Samarqand',
+                                author=self.reader if i % 4 else self.user)
+            for i in range(14)
+        ]
+        self.hidden = Post.objects.create(title='Qoralama', content='Matn', author=self.user, is_active=False)
+        Like.objects.create(user=self.reader, content_type=ContentType.objects.get_for_model(Post),
+                            object_id=self.posts[2].pk)
+        Comment.objects.create(content='Izoh', author=self.reader, post=self.posts[2])
+        Notification.objects.bulk_create(
+            Notification(recipient=self.user, actor=self.reader, verb='commented', target_type='post',
+                         target_id=self.posts[2].pk, is_read=i % 2 == 0)
+            for i in range(13)
+        )
+        self.client = APIClient()
+        patcher = mock.patch.object(ViewCounterBuffer, '_start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(post_views.flush)
+
+    def assertSameResponse(self, sync_name, async_name, kwargs=None, params=None):
+        sync = self.client.get(reverse(sync_name, kwargs=kwargs), params)
+        response = self.client.get(reverse(async_name, kwargs=kwargs), params)
+        self.assertEqual(response.status_code, sync.status_code, params)
+        # Page links point back at the endpoint that served them
+        self.assertEqual(response.content.replace(b'/async/', b'/'), sync.content, params)
+        return response
+
+    def test_post_list_filters_and_pages_match(self):
+        for params in (
+            {'author__username': 'olim'},
+            {'search': 'samarqand'},
+            {'search': 'post, toshkent', 'ordering': 'title'},
+            {'page': 2},
+            {'page': 3},
+            {'page': 'x'},
+        ):
+            self.assertSameResponse('post_list_create', 'post_list_async', params=params)
+
+    def test_post_detail_matches(self):
+        response = self.assertSameResponse('post_detail', 'post_detail_async', {'pk': self.posts[2].pk})
+        self.assertEqual((response.json()['likes_count'], response.json()['comments_count']), (1, 1))
+        self.assertSameResponse('post_detail', 'post_detail_async', {'pk': self.hidden.pk})
+        post_views.flush()
+        self.assertEqual(Post.objects.get(pk=self.posts[2].pk).views_count, 2)
+
+    def test_comment_pages_match(self):
+        kwargs = {'post_id': self.posts[2].pk}
+        self.assertSameResponse('comment_list_create', 'comment_list_async', kwargs)
+        self.assertSameResponse('comment_list_create', 'comment_list_async', {'post_id': self.hidden.pk + 1})
+
+    def test_notifications_match_and_require_authentication(self):
+        response = self.client.get(reverse('notification_list_async'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        for params in ({}, {'is_read': 'false'}, {'is_read': 'true', 'page': 2}):
+            self.assertSameResponse('notification_list', 'notification_list_async', params=params)
@@ -1,21 +1,28 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 
 urlpatterns = [
     path('posts/', views.PostListCreateView.as_view(), name='post_list_create'),
+    path('posts/async/', async_views.post_list_async, name='post_list_async'),
+    path('posts/view-stats/', views.post_view_stats, name='post_view_stats'),
     path('posts/<int:pk>/', views.PostDetailView.as_view(), name='post_detail'),
+    path('posts/<int:pk>/async/', async_views.post_detail_async, name='post_detail_async'),
     path('posts/<int:id>/like/', views.like_post, name='like_post'),
     path('posts/<int:id>/unlike/', views.unlike_post, name='unlike_post'),
 
     path('posts/<int:post_id>/comments/', views.CommentListCreateView.as_view(), name='comment_list_create'),
+    path('posts/<int:post_id>/comments/async/', async_views.comment_list_async, name='comment_list_async'),
     path('comments/<int:pk>/', views.CommentDetailView.as_view(), name='comment_detail'),
     path('comments/<int:id>/like/', views.like_comment, name='like_comment'),
     path('comments/<int:id>/unlike/', views.unlike_comment, name='unlike_comment'),
 
     path('notifications/', views.NotificationListView.as_view(), name='notification_list'),
+    path('notifications/async/', async_views.notification_list_async, name='notification_list_async'),
     path('notifications/<int:id>/mark-as-read/', views.mark_notification_as_read, name='mark_notification_read'),
     path('notifications/mark-all-as-read/', views.mark_all_notifications_as_read, name='mark_all_notifications_read'),
 
+    path('profiles/<str:username>/stats/', views.author_stats, name='author_stats'),
+
     path('search/', views.search, name='search'),
 ]
@@ -0,0 +1,153 @@
+"""
+Write-buffered Post.views_count: detail views add to an in-process dict and
+a background thread flushes it every VIEW_COUNT_FLUSH_INTERVAL seconds with
+one UPDATE ... CASE statement per chunk, all in one transaction, so readers
+never wait on the write lock.
+Pending views are flushed at interpreter exit; a hard kill loses at most
+one interval of views.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Most post ids per UPDATE. A statement binds each id twice (IN and WHEN),
+# one value per WHEN branch and the default, and _chunks() also keeps that
+# total within the backend's max_query_params (999 on SQLite)
+FLUSH_CHUNK_SIZE = 400
+
+
+class ViewCounterBuffer:
+    def __init__(self):
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._oldest = None
+        self.last_flush_at = None
+        self.last_flush_seconds = 0.0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+
+    def record(self, post_id):
+        with self._lock:
+            self._pending[post_id] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            backlog = len(self._pending)
+        if self._thread is None:
+            self._start()
+        if backlog >= settings.VIEW_COUNT_MAX_PENDING:
+            self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='post-view-flush', daemon=True)
+        atexit.register(self.flush)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.VIEW_COUNT_FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Write the pending increments; returns the number of views written."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            oldest, self._oldest = self._oldest, None
+        if not pending:
+            return 0
+
+        start = time.monotonic()
+        # Posts with the same increment share one WHEN branch
+        by_increment = defaultdict(list)
+        for post_id, views in pending.items():
+            by_increment[views].append(post_id)
+        try:
+            # One transaction, so a failed chunk rolls back the ones before it
+            # and re-queuing everything below cannot count a view twice
+            with transaction.atomic():
+                max_params = connections[Post.objects.db].features.max_query_params
+                for chunk in _chunks(list(by_increment.items()), FLUSH_CHUNK_SIZE, max_params):
+                    ids = [post_id for _views, post_ids in chunk for post_id in post_ids]
+                    Post.objects.filter(pk__in=ids).update(views_count=F('views_count') + Case(
+                        *(When(pk__in=post_ids, then=Value(views)) for views, post_ids in chunk),
+                        default=Value(0),
+                        output_field=PositiveIntegerField(),
+                    ))
+        except Exception:
+            # Keep the views for the next flush rather than dropping them
+            logger.exception("Flushing post view counts failed")
+            with self._lock:
+                for post_id, views in pending.items():
+                    self._pending[post_id] += views
+                if oldest is not None and (self._oldest is None or oldest < self._oldest):
+                    self._oldest = oldest
+                self.failed_flushes += 1
+            return 0
+
+        written = sum(pending.values())
+        self.last_flush_at = time.time()
+        self.last_flush_seconds = time.monotonic() - start
+        self.flushed_views += written
+        return written
+
+    def lag(self):
+        """Seconds the oldest unflushed view has been waiting."""
+        oldest = self._oldest
+        return time.monotonic() - oldest if oldest is not None else 0.0
+
+    def stats(self):
+        with self._lock:
+            pending_posts, pending_views = len(self._pending), sum(self._pending.values())
+        return {
+            'pending_posts': pending_posts,
+            'pending_views': pending_views,
+            'flush_lag_seconds': round(self.lag(), 3),
+            'flush_interval_seconds': settings.VIEW_COUNT_FLUSH_INTERVAL,
+            'last_flush_at': self.last_flush_at,
+            'last_flush_seconds': round(self.last_flush_seconds, 4),
+            'flushed_views': self.flushed_views,
+            'failed_flushes': self.failed_flushes,
+        }
+
+
+def _chunks(items, max_ids, max_params=None):
+    """
+    Split (views, post_ids) groups into chunks of at most `max_ids` post ids
+    whose UPDATE binds at most `max_params` parameters: two per id, one per
+    WHEN branch and one for the default.
+    """
+    chunk, ids, params = [], 0, 1
+    for views, post_ids in items:
+        while post_ids:
+            room = max_ids - ids
+            if max_params is not None:
+                room = min(room, (max_params - params - 1) // 2)
+            if room <= 0:
+                yield chunk
+                chunk, ids, params = [], 0, 1
+                continue
+            part, post_ids = post_ids[:room], post_ids[room:]
+            chunk.append((views, part))
+            ids += len(part)
+            params += 2 * len(part) + 1
+    if chunk:
+        yield chunk
+
+
+post_views = ViewCounterBuffer()
@@ -1,32 +1,53 @@
 from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from datetime import timedelta
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.db.models import Min, Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Post, Comment, Like, Notification
+from .models import Post, Comment, Like, Notification, AuthorDailyStats, RollupWatermark
 from .serializers import (
     PostSerializer, PostCreateSerializer, PostUpdateSerializer,
     CommentSerializer, CommentCreateSerializer, CommentUpdateSerializer,
-    LikeSerializer, NotificationSerializer
+    LikeSerializer, NotificationSerializer, PostReadSerializer, CommentReadSerializer, PostCommentReadSerializer
 )
 from accounts.models import Profile
 from accounts.serializers import ProfileSerializer
-
-
-class PostListCreateView(generics.ListCreateAPIView):
-    queryset = Post.objects.filter(is_active=True)
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+from core.filters import AnnotatedOrderingFilter
+from core.serializers import compile_serializer
+from core.views import CompiledListMixin
+from .queries import comments_total, likes_total
+from .rollups import COUNTERS
+from .view_counter import post_views
+
+
+class PostListCreateView(CompiledListMixin, generics.ListCreateAPIView):
+    """GET pages are rendered from like/comment counts annotated in the page query."""
+    queryset = Post.objects.filter(is_active=True).select_related('author')
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, AnnotatedOrderingFilter]
     filterset_fields = ['author__username']
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'title', 'likes_count']
+    ordering_annotations = {'likes_count': 'likes_total'}
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = queryset.annotate(likes_total=likes_total(Post), comments_total=comments_total())
+        return queryset
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return PostCreateSerializer
-        return PostSerializer
+        return PostReadSerializer
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -38,8 +59,51 @@ class PostListCreateView(generics.ListCreateAPIView):
 
 
 class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    GET ?include=comments adds the first comment page (without the post
+    repeated per comment) under 'comments', in two queries: the post with
+    its author and counts, and the comments with their authors and likes.
+    """
     queryset = Post.objects.filter(is_active=True)
 
+    def includes_comments(self):
+        return self.request.method == 'GET' and 'comments' in self.request.query_params.get('include', '').split(',')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.includes_comments():
+            queryset = queryset.select_related('author').annotate(
+                likes_total=likes_total(Post),
+                comments_total=comments_total(),
+            )
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        post = self.get_object()
+        post_views.record(post.pk)
+        if not self.includes_comments():
+            return Response(self.get_serializer(post).data)
+
+        context = self.get_serializer_context()
+        page_size = api_settings.PAGE_SIZE
+        comments = Comment.objects.filter(post=post, is_active=True).select_related('author').annotate(
+            likes_total=likes_total(Comment),
+        ).order_by('-created_at')[:page_size]
+
+        next_url = None
+        if post.comments_total > page_size:
+            next_url = replace_query_param(
+                request.build_absolute_uri(reverse('comment_list_create', kwargs={'post_id': post.pk})), 'page', 2
+            )
+        data = compile_serializer(PostReadSerializer).to_representation(post, context)
+        data['comments'] = {
+            'count': post.comments_total,
+            'next': next_url,
+            'previous': None,
+            'results': compile_serializer(PostCommentReadSerializer).many(comments, context),
+        }
+        return Response(data)
+
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
             return PostUpdateSerializer
@@ -65,6 +129,13 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def post_view_stats(request):
+    """View-count buffer of the worker serving this request, including its flush lag."""
+    return Response(post_views.stats())
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def like_post(request, id):
@@ -111,15 +182,31 @@ def unlike_post(request, id):
         return Response({'detail': 'Not liked yet'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentListCreateView(CompiledListMixin, generics.ListCreateAPIView):
+    """GET pages annotate each comment's likes and fetch the shared post once."""
     serializer_class = CommentSerializer
-    filter_backends = [filters.OrderingFilter]
+    filter_backends = [AnnotatedOrderingFilter]
     ordering_fields = ['created_at', 'likes_count']
+    ordering_annotations = {'likes_count': 'likes_total'}
     ordering = ['-created_at']
 
     def get_queryset(self):
         post_id = self.kwargs['post_id']
-        return Comment.objects.filter(post_id=post_id, is_active=True)
+        queryset = Comment.objects.filter(post_id=post_id, is_active=True)
+        if self.request.method == 'GET':
+            return queryset.select_related('author').annotate(likes_total=likes_total(Comment))
+        return queryset.select_related('author', 'post__author')
+
+    def prepare_rows(self, rows):
+        # Every comment nests the same post: fetch it once instead of joining it per row
+        if rows:
+            post = Post.objects.select_related('author').annotate(
+                likes_total=likes_total(Post),
+                comments_total=comments_total(),
+            ).get(pk=self.kwargs['post_id'])
+            for comment in rows:
+                comment.post = post
+        return rows
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -129,7 +216,7 @@ class CommentListCreateView(generics.ListCreateAPIView):
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return CommentCreateSerializer
-        return CommentSerializer
+        return CommentReadSerializer
 
     def perform_create(self, serializer):
         post_id = self.kwargs['post_id']
@@ -219,14 +306,14 @@ def unlike_comment(request, id):
         return Response({'detail': 'Not liked yet'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(CompiledListMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['is_read']
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
+        return Notification.objects.filter(recipient=self.request.user).select_related('recipient', 'actor')
 
 
 @api_view(['POST'])
@@ -286,3 +373,65 @@ def search(request):
         }
 
     return Response(results)
+
+
+def _stats_range(request):
+    """(from, to) dates of a stats request, or an error message."""
+    dates = {}
+    for param in ('from', 'to'):
+        value = request.GET.get(param)
+        if value is None:
+            continue
+        try:
+            # parse_date() returns None for malformed input and raises for impossible dates
+            dates[param] = parse_date(value)
+        except ValueError:
+            dates[param] = None
+        if dates[param] is None:
+            return None, None, 'Dates must be valid YYYY-MM-DD values'
+    end = dates.get('to') or timezone.localdate()
+    start = dates.get('from') or end - timedelta(days=settings.AUTHOR_STATS_DEFAULT_DAYS - 1)
+    if start > end:
+        return None, None, "'from' must not be after 'to'"
+    if (end - start).days >= settings.AUTHOR_STATS_MAX_DAYS:
+        return None, None, f'At most {settings.AUTHOR_STATS_MAX_DAYS} days can be requested'
+    return start, end, None
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def author_stats(request, username):
+    """
+    Daily posts, likes and comments received and followers gained for
+    ?from=&to= (YYYY-MM-DD), read from the rollups in three queries. The
+    numbers are as fresh as the last rollup_author_stats run ('as_of').
+    """
+    profile = get_object_or_404(Profile.objects.select_related('user'), user__username=username)
+    if profile.user != request.user and request.user.role != 'admin':
+        return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    start, end, error = _stats_range(request)
+    if error:
+        return Response({'detail': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = {
+        row['day']: row
+        for row in AuthorDailyStats.objects.filter(author=profile.user, day__range=(start, end)).values('day', *COUNTERS)
+    }
+    days, totals = [], dict.fromkeys(COUNTERS, 0)
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        row = rows.get(day)
+        counts = {counter: row[counter] if row else 0 for counter in COUNTERS}
+        for counter, value in counts.items():
+            totals[counter] += value
+        days.append({'date': day, **counts})
+
+    return Response({
+        'username': profile.user.username,
+        'from': start,
+        'to': end,
+        'as_of': RollupWatermark.objects.aggregate(as_of=Min('updated_at'))['as_of'],
+        'followers_count': profile.followers_count,
+        'totals': totals,
+        'days': days,
+    })
@@ -0,0 +1,9 @@
+"""
+Admin URLconf, imported on the first /admin/ request or admin reverse()
+rather than with config.urls, so API workers do not load the admin modules.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
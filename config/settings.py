@@ -12,7 +12,8 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lambda v: [s.strip() for s in v.split(',')])
 
 DJANGO_APPS = [
-    'django.contrib.admin',
+    # Admin modules are discovered from config/urls.py only when ADMIN_ENABLED
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -23,6 +24,7 @@ DJANGO_APPS = [
 THIRD_PARTY_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'django_filters',
 ]
@@ -30,11 +32,13 @@ THIRD_PARTY_APPS = [
 LOCAL_APPS = [
     'accounts.apps.AccountsConfig',
     'blog.apps.BlogConfig',
+    'core.apps.CoreConfig',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'core.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -43,6 +47,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -73,6 +78,24 @@ DATABASES = {
     }
 }
 
+# Password hashing. The first hasher is used for new hashes; older hashes
+# are upgraded transparently on the next successful login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='django.contrib.auth.hashers.PBKDF2PasswordHasher')
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    hasher for hasher in [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ] if hasher != PASSWORD_HASHER
+]
+
+# Async login: password hashes run in a bounded pool (LOGIN_HASH_WORKERS threads
+# plus LOGIN_HASH_QUEUE_SIZE waiting); further logins get a 503.
+LOGIN_HASH_WORKERS = config('LOGIN_HASH_WORKERS', default=os.cpu_count() or 1, cast=int)
+LOGIN_HASH_QUEUE_SIZE = config('LOGIN_HASH_QUEUE_SIZE', default=64, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -102,6 +125,17 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# 'python' streams files from Django (with Range support); 'x-sendfile' (Apache/lighttpd)
+# and 'x-accel-redirect' (nginx, internal location at MEDIA_ACCEL_REDIRECT_PREFIX)
+# hand the transfer to the front-end server
+MEDIA_SERVE_MODE = config('MEDIA_SERVE_MODE', default='python')
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# Cache lifetime for media that isn't content-addressed (hashed names are immutable)
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)
+
+# Profile image thumbnails (square sizes in px, rendered as WebP and JPEG)
+PROFILE_IMAGE_SIZES = [64, 256, 1024]
+PROFILE_IMAGE_WORKERS = config('PROFILE_IMAGE_WORKERS', default=2, cast=int)
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -112,11 +146,15 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
@@ -126,6 +164,48 @@ REST_FRAMEWORK = {
     ],
 }
 
+# JSON encoding for API responses: 'auto' uses orjson when installed, else the stdlib
+JSON_RENDERER_BACKEND = config('JSON_RENDERER_BACKEND', default='auto')
+
+# Response compression (brotli when installed, else gzip) for API-type content
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+COMPRESSION_CONTENT_TYPES = [
+    'application/json',
+    'application/javascript',
+    'text/css',
+    'text/plain',
+    'image/svg+xml',
+]
+
+# /api/v1/batch/: sub-requests per batch, their allowed methods and URL prefix
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_ALLOWED_METHODS = config('BATCH_ALLOWED_METHODS', default='GET', cast=lambda v: [s.strip().upper() for s in v.split(',')])
+BATCH_PATH_PREFIX = config('BATCH_PATH_PREFIX', default='/api/v1/')
+
+# Cache. The default LocMemCache is private to each worker process; run
+# several workers against a shared backend (Redis, Memcached) so that
+# cache invalidation reaches all of them.
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='default'),
+    }
+}
+# Invalidations written to a per-process cache never reach other workers,
+# so the security-sensitive caches below are off by default with one
+CACHE_IS_SHARED = CACHE_BACKEND not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Authenticated users resolved from JWTs are cached for this many seconds
+# (0 disables the cache). Saves to User/Profile and follow counter updates
+# invalidate the entry in the shared cache.
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30 if CACHE_IS_SHARED else 0, cast=int)
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -141,8 +221,17 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
 }
 
+# Refresh-token blacklist: per-process Bloom filter in front of the database.
+# Workers learn of other workers' logouts through the shared cache; without
+# one they re-read new blacklist rows on every check (sync interval 0).
+BLACKLIST_BLOOM_CAPACITY = config('BLACKLIST_BLOOM_CAPACITY', default=200000, cast=int)
+BLACKLIST_BLOOM_ERROR_RATE = config('BLACKLIST_BLOOM_ERROR_RATE', default=0.001, cast=float)
+BLACKLIST_BLOOM_SYNC_INTERVAL = config('BLACKLIST_BLOOM_SYNC_INTERVAL', default=5 if CACHE_IS_SHARED else 0, cast=int)
+BLACKLIST_BLOOM_REBUILD_INTERVAL = config('BLACKLIST_BLOOM_REBUILD_INTERVAL', default=3600, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS', 
@@ -161,6 +250,41 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@example.com')
 
+# Email outbox (delivered by `python manage.py send_outbox --loop`)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_BASE = config('EMAIL_OUTBOX_RETRY_BASE', default=30, cast=int)
+EMAIL_OUTBOX_RETRY_MAX = config('EMAIL_OUTBOX_RETRY_MAX', default=3600, cast=int)
+EMAIL_OUTBOX_CLAIM_TIMEOUT = config('EMAIL_OUTBOX_CLAIM_TIMEOUT', default=300, cast=int)
+
+# Minify the HTML email templates once at import time
+EMAIL_TEMPLATES_MINIFY = config('EMAIL_TEMPLATES_MINIFY', default=True, cast=bool)
+
+# Email verification / password reset token lifetimes
+VERIFICATION_TOKEN_LIFETIME = timedelta(days=config('VERIFICATION_TOKEN_LIFETIME_DAYS', default=3, cast=int))
+PASSWORD_RESET_TOKEN_LIFETIME = timedelta(hours=config('PASSWORD_RESET_TOKEN_LIFETIME_HOURS', default=24, cast=int))
+
+# Follow graph: in-process follower bitmaps for accounts with many followers
+FOLLOW_GRAPH_HOT_THRESHOLD = config('FOLLOW_GRAPH_HOT_THRESHOLD', default=10000, cast=int)
+FOLLOW_GRAPH_CACHE_SIZE = config('FOLLOW_GRAPH_CACHE_SIZE', default=64, cast=int)
+FOLLOW_GRAPH_CACHE_TTL = config('FOLLOW_GRAPH_CACHE_TTL', default=60, cast=int)
+BULK_FOLLOW_MAX_USERNAMES = config('BULK_FOLLOW_MAX_USERNAMES', default=100, cast=int)
+
+# Post view counts are buffered in memory and flushed every interval, or
+# sooner once this many distinct posts are pending
+VIEW_COUNT_FLUSH_INTERVAL = config('VIEW_COUNT_FLUSH_INTERVAL', default=10, cast=float)
+VIEW_COUNT_MAX_PENDING = config('VIEW_COUNT_MAX_PENDING', default=5000, cast=int)
+
+# /profiles/<username>/stats/: default and maximum day range read from the rollups
+AUTHOR_STATS_DEFAULT_DAYS = config('AUTHOR_STATS_DEFAULT_DAYS', default=30, cast=int)
+AUTHOR_STATS_MAX_DAYS = config('AUTHOR_STATS_MAX_DAYS', default=366, cast=int)
+
+# Username typeahead: in-process prefix index, reloaded in the background
+TYPEAHEAD_MAX_RESULTS = config('TYPEAHEAD_MAX_RESULTS', default=10, cast=int)
+# Prefixes matching more usernames than this have their top results precomputed
+TYPEAHEAD_SCAN_LIMIT = config('TYPEAHEAD_SCAN_LIMIT', default=1000, cast=int)
+TYPEAHEAD_REFRESH_INTERVAL = config('TYPEAHEAD_REFRESH_INTERVAL', default=300, cast=int)
+
 # Site settings
 SITE_URL = config('SITE_URL', default='http://localhost:8000')
 
@@ -175,6 +299,14 @@ if not DEBUG:
     SESSION_COOKIE_SECURE = config('SESSION_COOKIE_SECURE', default=True, cast=bool)
     CSRF_COOKIE_SECURE = config('CSRF_COOKIE_SECURE', default=True, cast=bool)
 
+# Profiling (sampled cProfile dumps in collapsed-stack format)
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.01, cast=float)
+PROFILING_HEADER = config('PROFILING_HEADER', default='X-Profile')
+PROFILING_TOKEN = config('PROFILING_TOKEN', default='')
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'logs' / 'profiling'))
+PROFILING_MAX_SAMPLES = config('PROFILING_MAX_SAMPLES', default=50, cast=int)
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -182,7 +314,7 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'core.log.LazyFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
         },
         'console': {
@@ -199,5 +331,19 @@ LOGGING = {
     },
 }
 
-# Create logs directory if it doesn't exist
-os.makedirs(BASE_DIR / 'logs', exist_ok=True)
+# Start-up: the admin can be left out of API-only workers, and warm_up()
+# builds URL resolver, serializer and in-process index caches before the
+# first request
+ADMIN_ENABLED = config('ADMIN_ENABLED', default=True, cast=bool)
+WARMUP_ON_STARTUP = config('WARMUP_ON_STARTUP', default=True, cast=bool)
+WARMUP_SERIALIZERS = [
+    'blog.serializers.PostReadSerializer',
+    'blog.serializers.CommentReadSerializer',
+    'blog.serializers.NotificationSerializer',
+    'accounts.serializers.UserSerializer',
+    'accounts.serializers.ProfileSerializer',
+]
+# In-process indexes loaded by warm_up(); each provides load()
+WARMUP_INDEXES = [
+    'accounts.typeahead.typeahead_index',
+]
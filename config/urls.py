@@ -14,19 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from core.views import BatchView, serve_media
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('api/v1/batch/', BatchView.as_view(), name='batch'),
     path('api/v1/auth/', include('accounts.urls')),
     path('api/v1/', include('blog.urls')),
+    path(settings.MEDIA_URL.strip('/') + '/<path:path>', serve_media, name='media'),
 ]
 
+if settings.ADMIN_ENABLED:
+    # A dotted path keeps the resolver lazy: the admin loads on first use
+    urlpatterns.insert(0, path('admin/', ('config.admin_urls', 'admin', 'admin')))
+
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
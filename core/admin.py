@@ -0,0 +1,7 @@
+from .paginator import EstimatedCountPaginator
+
+
+class LargeTableAdminMixin:
+    """Admin defaults for tables that grow to millions of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
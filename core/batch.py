@@ -0,0 +1,128 @@
+"""
+In-process dispatch for /api/v1/batch/.
+
+Each sub-request is resolved through the URLconf and handed straight to its
+view, skipping the middleware chain. Sub-requests reuse the batch request's
+authenticated user (DRF's forced authentication), so the JWT is decoded and
+the user loaded once per batch instead of once per call.
+"""
+import asyncio
+from io import BytesIO
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, get_resolver
+from rest_framework.exceptions import ValidationError
+from .renderers import dumps
+
+# Headers of the batch request that must not leak into its sub-requests
+_DROPPED_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_CONTENT_ENCODING')
+
+
+class BatchSubRequest(HttpRequest):
+    """An HttpRequest built from one entry of a batch, sharing the parent's client metadata."""
+
+    def __init__(self, parent, method, path, query, body):
+        super().__init__()
+        self._parent = parent
+        self.method = method
+        self.path = self.path_info = path
+        self.META = {
+            key: value for key, value in parent.META.items()
+            if key not in _DROPPED_META and not key.startswith('HTTP_IF_')
+        }
+        self.META.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            # Sub-responses are always embedded as JSON
+            'HTTP_ACCEPT': 'application/json',
+        })
+        self.GET = QueryDict(query)
+        self.COOKIES = parent.COOKIES
+        if body is not None:
+            self._body = body
+            self.META['CONTENT_TYPE'] = 'application/json'
+            self.META['CONTENT_LENGTH'] = str(len(body))
+        else:
+            self._body = b''
+        self._stream = BytesIO(self._body)
+        self._read_started = False
+        if hasattr(parent, 'urlconf'):
+            self.urlconf = parent.urlconf
+
+    def _get_scheme(self):
+        return self._parent.scheme
+
+
+def parse_batch(data):
+    """Validate the batch payload; returns [(method, path, query, body bytes or None)]."""
+    entries = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValidationError({'requests': ["A non-empty list of sub-requests is required."]})
+    if len(entries) > settings.BATCH_MAX_REQUESTS:
+        raise ValidationError({'requests': [f"At most {settings.BATCH_MAX_REQUESTS} sub-requests are allowed."]})
+
+    parsed = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get('path'), str):
+            raise ValidationError({'requests': [f"Sub-request {index} needs a 'path'."]})
+        method = str(entry.get('method', 'GET')).upper()
+        if method not in settings.BATCH_ALLOWED_METHODS:
+            raise ValidationError({'requests': [f"Sub-request {index}: method {method} is not allowed."]})
+        url = urlsplit(entry['path'])
+        if url.scheme or url.netloc or not url.path.startswith(settings.BATCH_PATH_PREFIX):
+            raise ValidationError(
+                {'requests': [f"Sub-request {index}: path must start with {settings.BATCH_PATH_PREFIX}."]}
+            )
+        body = dumps(entry['body']) if entry.get('body') is not None else None
+        parsed.append((method, url.path, url.query, body))
+    return parsed
+
+
+def _error(status, detail):
+    return status, dumps({'detail': detail})
+
+
+def dispatch(request, method, path, query, body, batch_view):
+    """Run one sub-request; returns (status code, JSON body bytes)."""
+    sub = BatchSubRequest(request._request, method, path, query, body)
+    try:
+        match = get_resolver(getattr(sub, 'urlconf', None)).resolve(path)
+    except Resolver404:
+        return _error(404, "Not found.")
+    if getattr(match.func, 'view_class', None) is batch_view:
+        return _error(400, "Batch requests cannot be nested.")
+
+    sub.resolver_match = match
+    sub.user = request.user
+    # Picked up by rest_framework.request.Request in place of running the authenticators
+    sub._force_auth_user, sub._force_auth_token = request.user, request.auth
+
+    view = match.func
+    if asyncio.iscoroutinefunction(view):
+        view = async_to_sync(view)
+    try:
+        response = view(sub, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+    except Exception as exc:
+        response = response_for_exception(sub, exc)
+
+    if response.streaming:
+        response.close()
+        return _error(400, "Streaming responses cannot be batched.")
+    content = response.content
+    if not content:
+        content = b'null'
+    elif not response.get('Content-Type', '').startswith('application/json'):
+        content = dumps(content.decode(response.charset or 'utf-8', 'replace'))
+    return response.status_code, content
+
+
+def render_batch(results):
+    """{"responses": [{"status": ..., "body": ...}, ...]} with sub-response bodies spliced in unparsed."""
+    parts = [b'{"status":%d,"body":%s}' % (status, content) for status, content in results]
+    return b'{"responses":[' + b','.join(parts) + b']}'
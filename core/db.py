@@ -0,0 +1,8 @@
+from django.db.models import Count, IntegerField, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, group_field):
+    """Correlated COUNT subquery, evaluated only for the rows actually selected."""
+    counts = queryset.order_by().values(group_field).annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
@@ -0,0 +1,18 @@
+from rest_framework.filters import OrderingFilter
+
+
+class AnnotatedOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter for fields served from annotations: public names listed in
+    the view's `ordering_annotations` ({'likes_count': 'likes_total'}) are
+    validated as usual, then ordered by the annotation they map to.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view) or []
+        annotations = getattr(view, 'ordering_annotations', {})
+        mapped = []
+        for term in ordering:
+            field = term.lstrip('-')
+            mapped.append(('-' if term.startswith('-') else '') + annotations.get(field, field))
+        return mapped
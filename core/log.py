@@ -0,0 +1,16 @@
+import logging
+from pathlib import Path
+
+
+class LazyFileHandler(logging.FileHandler):
+    """
+    FileHandler that opens its file on the first record and creates the
+    parent directory then, so loading settings touches no filesystem.
+    """
+
+    def __init__(self, filename, mode='a', encoding=None, delay=True, errors=None):
+        super().__init__(filename, mode, encoding, delay, errors)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
@@ -0,0 +1,103 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from accounts.models import Profile
+from blog.models import Post
+
+ENDPOINTS = {
+    'post_list': ('post_list_create', 'post_list_async'),
+    'post_detail': ('post_detail', 'post_detail_async'),
+    'comments': ('comment_list_create', 'comment_list_async'),
+    'profile': ('profile_detail', 'profile_detail_async'),
+}
+
+
+class Command(BaseCommand):
+    help = "Compare a read endpoint served by the sync (WSGI) view and its async (ASGI) counterpart"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='post_list')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help="Concurrent connections opened against the ASGI handler")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="WSGI worker threads, i.e. connections it can serve at once")
+
+    def _urls(self, endpoint):
+        sync_name, async_name = ENDPOINTS[endpoint]
+        if endpoint == 'post_list':
+            return reverse(sync_name), reverse(async_name)
+        if endpoint == 'profile':
+            username = Profile.objects.values_list('user__username', flat=True).first()
+            if username is None:
+                raise CommandError("No profiles to benchmark; create some users first.")
+            kwargs = {'username': username}
+        else:
+            post_id = Post.objects.filter(is_active=True).values_list('pk', flat=True).first()
+            if post_id is None:
+                raise CommandError("No posts to benchmark; create some posts first.")
+            kwargs = {'pk': post_id} if endpoint == 'post_detail' else {'post_id': post_id}
+        return reverse(sync_name, kwargs=kwargs), reverse(async_name, kwargs=kwargs)
+
+    # The test clients always send Host: testserver
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        total = options['requests']
+        sync_url, async_url = self._urls(options['endpoint'])
+        self.stdout.write(f"{total} requests, WSGI with {options['threads']} threads, "
+                          f"ASGI with {options['concurrency']} connections on one event loop")
+
+        Client().get(sync_url)
+        local = threading.local()
+
+        def sync_request(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            start = time.perf_counter()
+            status = local.client.get(sync_url).status_code
+            return status, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(sync_request, range(total)))
+        self._report(f"WSGI {sync_url}", results, time.perf_counter() - start, options['threads'])
+
+        async def run_async():
+            async_client = AsyncClient()
+            await async_client.get(async_url)
+            in_flight = peak = 0
+            queue = iter(range(total))
+            results = []
+
+            async def connection():
+                nonlocal in_flight, peak
+                for _ in queue:
+                    in_flight += 1
+                    peak = max(peak, in_flight)
+                    begin = time.perf_counter()
+                    response = await async_client.get(async_url)
+                    results.append((response.status_code, time.perf_counter() - begin))
+                    in_flight -= 1
+
+            begin = time.perf_counter()
+            await asyncio.gather(*(connection() for _ in range(options['concurrency'])))
+            return results, time.perf_counter() - begin, peak
+
+        results, elapsed, peak = asyncio.run(run_async())
+        self._report(f"ASGI {async_url}", results, elapsed, peak)
+
+    def _report(self, label, results, elapsed, in_flight):
+        latencies = sorted(latency for _, latency in results)
+        errors = sum(1 for status, _ in results if status != 200)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{label}: {len(results) / elapsed:.1f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, "
+            f"{in_flight} requests in flight, {errors} errors"
+        )
@@ -0,0 +1,67 @@
+import gzip
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from blog.models import Post
+from blog.serializers import PostSerializer
+from core import renderers
+from core.middleware import brotli
+
+
+class Command(BaseCommand):
+    help = "Measure JSON encode time and compressed size of the /posts/ response"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def _page_data(self, page_size):
+        """The body of a /posts/ page: pagination envelope around PostSerializer output."""
+        posts = list(Post.objects.filter(is_active=True).select_related('author')[:page_size])
+        if not posts:
+            raise CommandError("No posts to benchmark; create some posts first.")
+        return {
+            'count': Post.objects.filter(is_active=True).count(),
+            'next': 'http://localhost:8000/api/v1/posts/?page=2',
+            'previous': None,
+            'results': PostSerializer(posts, many=True).data,
+        }
+
+    def _time(self, encode, data, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            body = encode(data)
+        return (time.perf_counter() - start) / iterations, body
+
+    def handle(self, *args, **options):
+        data = self._page_data(options['page_size'])
+        iterations = options['iterations']
+        self.stdout.write(f"/posts/ page of {len(data['results'])} posts, {iterations} iterations")
+
+        drf = JSONRenderer()
+        encoders = [('DRF JSONRenderer', drf.render), ('stdlib (tuned)', renderers._dumps_stdlib)]
+        if renderers.orjson is not None:
+            encoders.append(('orjson', renderers._dumps_orjson))
+        else:
+            self.stdout.write("orjson is not installed; skipping it")
+
+        baseline = None
+        for label, encode in encoders:
+            seconds, body = self._time(encode, data, iterations)
+            baseline = baseline or seconds
+            self.stdout.write(
+                f"{label:<18} {seconds * 1e6:8.1f} us/encode  {baseline / seconds:5.1f}x  {len(body)} bytes"
+            )
+
+        self.stdout.write("Bytes on the wire:")
+        raw = renderers.dumps(data)
+        sizes = [('identity', raw)]
+        for level in (1, 6, 9):
+            sizes.append((f'gzip -{level}', gzip.compress(raw, compresslevel=level, mtime=0)))
+        if brotli is not None:
+            for quality in (4, 11):
+                sizes.append((f'br q{quality}', brotli.compress(raw, quality=quality)))
+        else:
+            self.stdout.write("brotli is not installed; skipping it")
+        for label, body in sizes:
+            self.stdout.write(f"{label:<18} {len(body):8d} bytes  {len(raw) / len(body):5.1f}x")
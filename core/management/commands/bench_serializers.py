@@ -0,0 +1,79 @@
+import time
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from accounts.models import Profile, User
+from accounts.serializers import ProfileSerializer, UserSerializer
+from blog.models import Comment, Notification, Post
+from blog.serializers import CommentReadSerializer, NotificationSerializer, PostReadSerializer
+from core.renderers import dumps
+from core.serializers import compile_serializer
+
+
+class Command(BaseCommand):
+    help = "Compare DRF serializers with their compiled read path per 1,000 in-memory objects"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--objects', type=int, default=1000)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def _objects(self, count):
+        """Unsaved instances with relations and count annotations set, so no query runs."""
+        now = timezone.now()
+        users = [
+            User(id=i, email=f'user{i}@example.com', username=f'user{i}', date_joined=now, is_verified=True)
+            for i in range(1, count + 1)
+        ]
+        posts = []
+        for i, user in enumerate(users, 1):
+            post = Post(id=i, title=f'Post {i}', content='Lorem ipsum ' * 20, author=user,
+                        created_at=now, updated_at=now)
+            post.likes_total, post.comments_total = i % 50, i % 7
+            posts.append(post)
+        comments = []
+        for i, post in enumerate(posts, 1):
+            comment = Comment(id=i, content='Comment text', author=post.author, post=post,
+                              created_at=now, updated_at=now)
+            comment.likes_total = i % 5
+            comments.append(comment)
+        profiles = [Profile(id=u.id, user=u, bio='Bio', followers_count=u.id, following_count=3) for u in users]
+        notifications = [
+            Notification(id=i, recipient=users[0], actor=user, verb='followed', target_type='profile',
+                         target_id=i, created_at=now)
+            for i, user in enumerate(users, 1)
+        ]
+        return [
+            (UserSerializer, users),
+            (PostReadSerializer, posts),
+            (CommentReadSerializer, comments),
+            (ProfileSerializer, profiles),
+            (NotificationSerializer, notifications),
+        ]
+
+    def _best(self, render, rounds):
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            data = render()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
+
+    def handle(self, *args, **options):
+        count, rounds = options['objects'], options['rounds']
+        context = {'request': RequestFactory().get('/', HTTP_HOST='localhost')}
+        per = 1000 / count
+        self.stdout.write(f"{count} objects, best of {rounds} rounds, ms per 1,000 objects")
+
+        for serializer_class, objects in self._objects(count):
+            compiled = compile_serializer(serializer_class)
+            drf_time, drf_data = self._best(
+                lambda: serializer_class(objects, many=True, context=context).data, rounds
+            )
+            compiled_time, compiled_data = self._best(lambda: compiled.many(objects, context), rounds)
+            identical = dumps(drf_data) == dumps(compiled_data)
+            self.stdout.write(
+                f"{serializer_class.__name__:<24} DRF {drf_time * 1000 * per:7.2f}  "
+                f"compiled {compiled_time * 1000 * per:6.2f}  {drf_time / compiled_time:5.1f}x  "
+                f"{'identical' if identical else 'OUTPUT DIFFERS'}"
+            )
@@ -0,0 +1,27 @@
+import io
+import pstats
+from django.core.management.base import BaseCommand, CommandError
+from core.profiling import iter_sample_files
+
+
+class Command(BaseCommand):
+    help = "List the top functions across profiling samples"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help="Only use samples for this view name (e.g. post_detail)")
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument('--sort', default='tottime', choices=['tottime', 'cumulative', 'ncalls'])
+
+    def handle(self, *args, **options):
+        files = iter_sample_files(options['view'])
+        if not files:
+            raise CommandError("No profiling samples found.")
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(str(files[0]), stream=buffer)
+        for path in files[1:]:
+            stats.add(str(path))
+
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(f"Aggregated {len(files)} samples.")
+        self.stdout.write(buffer.getvalue())
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime; the timings come back on stdout
+CHILD = """
+import json, os, time
+os.environ['WARMUP_ON_STARTUP'] = 'False'
+start = time.perf_counter()
+import config.{target}
+loaded = time.perf_counter() - start
+from core.warmup import warm_up
+start = time.perf_counter()
+steps = warm_up()
+print(json.dumps({{'load': loaded, 'warmup': time.perf_counter() - start, 'steps': steps}}))
+"""
+
+
+def parse_importtime(output):
+    """[(module, self_us, cumulative_us, depth)] from `python -X importtime` stderr."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Profile worker cold start: per-module import times, application load and warm-up"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=('wsgi', 'asgi'), default='wsgi')
+        parser.add_argument('--by', choices=('package', 'module'), default='package',
+                            help="Aggregate self time by top-level package or list single modules")
+        parser.add_argument('--top', type=int, default=20)
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD.format(target=options['target'])],
+            capture_output=True, text=True, env=env,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Start-up failed:\n{result.stderr[-2000:]}")
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(result.stderr)
+        top = options['top']
+
+        self.stdout.write(
+            f"config.{options['target']}: {len(rows)} modules imported, "
+            f"{sum(row[1] for row in rows) / 1000:.1f} ms import time, "
+            f"{timings['load'] * 1000:.1f} ms to load the application"
+        )
+        self.stdout.write(f"warm_up(): {timings['warmup'] * 1000:.1f} ms")
+        for step, (items, seconds) in timings['steps'].items():
+            self.stdout.write(f"  {step:<12} {items:5d} items  {seconds * 1000:7.1f} ms")
+
+        if options['by'] == 'package':
+            totals = defaultdict(lambda: [0, 0])
+            for name, self_us, _, _ in rows:
+                package = totals[name.split('.')[0]]
+                package[0] += self_us
+                package[1] += 1
+            self.stdout.write(f"\nTop {top} packages by self time:")
+            self.stdout.write(f"{'package':<36}{'ms':>9}{'modules':>9}")
+            for package, (self_us, count) in sorted(totals.items(), key=lambda item: -item[1][0])[:top]:
+                self.stdout.write(f"{package:<36}{self_us / 1000:>9.1f}{count:>9}")
+        else:
+            self.stdout.write(f"\nTop {top} modules by self time:")
+            self.stdout.write(f"{'module':<56}{'self ms':>9}{'cumul ms':>10}")
+            for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: -row[1])[:top]:
+                self.stdout.write(f"{name:<56}{self_us / 1000:>9.1f}{cumulative_us / 1000:>10.1f}")
+
+        # Top-level imports show what each first-party or third-party entry point drags in
+        self.stdout.write(f"\nTop {top} imports by cumulative time (outermost only):")
+        outermost = [row for row in rows if row[3] == 0]
+        for name, _, cumulative_us, _ in sorted(outermost, key=lambda row: -row[2])[:top]:
+            self.stdout.write(f"{name:<56}{cumulative_us / 1000:>10.1f}")
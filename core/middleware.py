@@ -0,0 +1,129 @@
+import cProfile
+import gzip
+import logging
+import random
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from .profiling import write_sample
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a PROFILING_SAMPLE_RATE fraction of requests with cProfile.
+
+    Sending the PROFILING_HEADER header forces profiling. When PROFILING_TOKEN
+    is set the header value must match it, otherwise it only works in DEBUG.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace('-', '_')
+        self.token = settings.PROFILING_TOKEN
+
+    def should_profile(self, request):
+        forced = request.META.get(self.header)
+        if forced:
+            if self.token:
+                return forced == self.token
+            return settings.DEBUG
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active
+            return self.get_response(request)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        try:
+            write_sample(profiler, view_name)
+        except OSError as e:
+            logger.warning("Failed to write profiling sample: %s", e)
+
+        return response
+
+
+def choose_encoding(accept_encoding):
+    """'br' or 'gzip' from an Accept-Encoding header (honouring q=0), or None."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get('*', 0.0)
+    if brotli is not None and accepted.get('br', wildcard) > 0:
+        return 'br'
+    if accepted.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Brotli (when installed) or gzip compression for responses of at least
+    COMPRESSION_MIN_SIZE bytes whose type is in COMPRESSION_CONTENT_TYPES.
+
+    HTML is left out by default: pages with CSRF tokens are the BREACH
+    target, while the JSON API authenticates with headers.
+    """
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.status_code in (204, 206, 304)
+            or response.has_header('Content-Encoding')
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        elif encoding == 'gzip':
+            compressed = gzip.compress(response.content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # A strong ETag must not be shared between encodings (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
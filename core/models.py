@@ -0,0 +1,85 @@
+import copy
+from django.db import models
+from django.db.models.fields.files import FieldFile
+
+
+class DirtyFieldsMixin(models.Model):
+    """
+    Track the values a row was loaded with, so save() only writes the
+    columns that changed (and skips the query entirely when none did).
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _tracked_fields(self):
+        deferred = self.get_deferred_fields()
+        return [
+            field for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in deferred
+        ]
+
+    def _current_value(self, field):
+        value = getattr(self, field.attname)
+        if isinstance(value, FieldFile):
+            return value.name
+        if isinstance(value, (dict, list)):
+            # JSONField values are mutated in place; keep a copy to compare against
+            return copy.deepcopy(value)
+        return value
+
+    def _snapshot(self, fields=None):
+        """Record the current values of `fields` (names or attnames), or of every tracked field."""
+        tracked = self._tracked_fields()
+        if fields is None:
+            self._loaded_values = {}
+        else:
+            fields = set(fields)
+            tracked = [field for field in tracked if field.name in fields or field.attname in fields]
+            if getattr(self, '_loaded_values', None) is None:
+                self._loaded_values = {}
+        for field in tracked:
+            self._loaded_values[field.attname] = self._current_value(field)
+
+    def get_dirty_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        # A field deferred at load time that now has a value was assigned
+        # directly (loading it goes through refresh_from_db and is snapshotted)
+        return [
+            field.name for field in self._tracked_fields()
+            if field.attname not in loaded or self._current_value(field) != loaded[field.attname]
+        ]
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not args
+        ):
+            dirty = self.get_dirty_fields()
+            if dirty is not None:
+                if dirty:
+                    dirty += [
+                        field.name for field in self._meta.concrete_fields
+                        if getattr(field, 'auto_now', False) and field.name not in dirty
+                    ]
+                # An empty update_fields makes Model.save() a no-op.
+                kwargs['update_fields'] = dirty
+        super().save(*args, **kwargs)
+        # Fields left out of update_fields keep their unsaved edits
+        self._snapshot(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using, fields, **kwargs)
+        # Loading a deferred field refreshes only that field; edits to the
+        # others are still unsaved
+        self._snapshot(fields)
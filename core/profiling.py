@@ -0,0 +1,101 @@
+import os
+import re
+import time
+import pstats
+from pathlib import Path
+from django.conf import settings
+
+
+def get_profiling_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def view_slug(view_name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', view_name or 'unresolved')
+
+
+def _func_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        # Built-in functions, e.g. <built-in method builtins.len>
+        return name.strip('<>')
+    return f'{name} ({os.path.basename(filename)}:{lineno})'
+
+
+def stats_to_collapsed(stats, min_us=1, max_depth=64):
+    """
+    Convert pstats.Stats into the collapsed-stack format read by
+    flamegraph.pl and speedscope: "root;child;leaf <microseconds>".
+
+    cProfile only records caller -> callee edges, so stacks are rebuilt
+    from the roots and time is split in proportion to each edge's
+    cumulative time.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    lines = {}
+
+    def walk(func, path, scale, depth):
+        cc, nc, tt, ct, callers = raw[func]
+        stack = path + (_func_label(func),)
+        own = int(tt * scale * 1_000_000)
+        if own >= min_us:
+            key = ';'.join(stack)
+            lines[key] = lines.get(key, 0) + own
+        if depth >= max_depth:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            callee_ct = raw[callee][3]
+            if callee_ct <= 0 or _func_label(callee) in stack:
+                continue
+            child_scale = min(scale * edge_ct / callee_ct, 1.0)
+            if raw[callee][3] * child_scale * 1_000_000 < min_us:
+                continue
+            walk(callee, stack, child_scale, depth + 1)
+
+    for root in roots:
+        walk(root, (), 1.0, 0)
+
+    return [f'{stack} {value}' for stack, value in sorted(lines.items())]
+
+
+def write_sample(profiler, view_name):
+    """Write a sample as .prof and .folded files into the view's directory."""
+    directory = get_profiling_dir() / view_slug(view_name)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    base = directory / f'{time.time_ns()}-{os.getpid()}'
+    profiler.dump_stats(f'{base}.prof')
+
+    stats = pstats.Stats(f'{base}.prof')
+    with open(f'{base}.folded', 'w', encoding='utf-8') as fh:
+        fh.write('\n'.join(stats_to_collapsed(stats)))
+        fh.write('\n')
+
+    rotate(directory, settings.PROFILING_MAX_SAMPLES)
+    return base
+
+
+def rotate(directory, keep):
+    """Keep only the newest `keep` samples for a view."""
+    samples = sorted(directory.glob('*.prof'), key=lambda p: p.name, reverse=True)
+    for old in samples[keep:]:
+        for path in (old, old.with_suffix('.folded')):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def iter_sample_files(view_name=None):
+    root = get_profiling_dir()
+    if not root.exists():
+        return []
+    if view_name:
+        return sorted((root / view_slug(view_name)).glob('*.prof'))
+    return sorted(root.glob('*/*.prof'))
@@ -0,0 +1,74 @@
+"""
+JSON encoding for API responses: orjson when installed, otherwise a reused
+stdlib encoder. JSON_RENDERER_BACKEND ('auto', 'orjson', 'stdlib') picks one.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def _dumps_orjson(data):
+    # DRF's encoder covers lazy strings, Decimal, QuerySets and the like, and
+    # formats datetimes the way the stdlib path does
+    return orjson.dumps(
+        data,
+        default=_encoder.default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+
+
+# Compact, UTF-8 and without the circular-reference bookkeeping; one instance
+# is reused instead of building an encoder per json.dumps() call.
+_stdlib_encoder = JSONEncoder(ensure_ascii=False, check_circular=False, separators=(',', ':'))
+
+
+def _dumps_stdlib(data):
+    return _stdlib_encoder.encode(data).encode()
+
+
+def get_backend():
+    backend = settings.JSON_RENDERER_BACKEND
+    if backend == 'auto':
+        return 'orjson' if orjson is not None else 'stdlib'
+    if backend == 'orjson' and orjson is None:
+        raise ImproperlyConfigured("JSON_RENDERER_BACKEND is 'orjson' but orjson is not installed.")
+    if backend not in ('orjson', 'stdlib'):
+        raise ImproperlyConfigured(f"Unknown JSON_RENDERER_BACKEND {backend!r}.")
+    return backend
+
+
+def dumps(data):
+    """Encode `data` to compact UTF-8 JSON bytes with the configured backend."""
+    ret = _dumps_orjson(data) if get_backend() == 'orjson' else _dumps_stdlib(data)
+    # Same escaping as DRF's JSONRenderer, keeping the output a JavaScript subset
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using dumps(); indented output (browsable API, ?indent) keeps DRF's path."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJsonResponse(HttpResponse):
+    """JsonResponse counterpart for plain Django (e.g. async) views."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
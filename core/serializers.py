@@ -0,0 +1,189 @@
+"""
+Compiled read path for DRF serializers.
+
+compile_serializer() inspects a serializer class once and turns every
+readable field into a small getter closure, so rendering a page skips
+Serializer.fields deep-copies, per-field get_attribute() dispatch and
+ReturnDict construction. The output matches Serializer(...).data.
+
+Model instances and values() rows are both accepted. For rows, nested
+serializers read `<relation>__<field>` keys, e.g. `author__username`, and
+SerializerMethodField/FileField need model instances.
+"""
+from collections.abc import Mapping
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import fields, serializers
+from rest_framework.settings import api_settings
+
+
+class _State:
+    """Per-call context: serializer context, current timezone and method-field serializer instances."""
+    __slots__ = ('context', 'tz', 'instances')
+
+    def __init__(self, context):
+        self.context = context or {}
+        self.tz = timezone.get_current_timezone()
+        self.instances = {}
+
+    def serializer(self, serializer_class):
+        instance = self.instances.get(serializer_class)
+        if instance is None:
+            instance = self.instances[serializer_class] = serializer_class(context=self.context)
+        return instance
+
+
+def _is_model_field(model, name):
+    if model is None:
+        return False
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def _accessors(field, model, prefix):
+    """(getter for model instances, getter for values() rows) of the field's source."""
+    attrs = field.source_attrs
+    # Plain model fields never need DRF's callable/ObjectDoesNotExist handling
+    if len(attrs) == 1 and _is_model_field(model, attrs[0]):
+        from_instance = attrgetter(attrs[0])
+    else:
+        def from_instance(obj):
+            return fields.get_attribute(obj, attrs)
+    return from_instance, itemgetter(prefix + '__'.join(attrs))
+
+
+def _datetime_representation(field):
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT) != fields.ISO_8601 or hasattr(field, 'timezone'):
+        return None
+
+    def represent(value, state):
+        if isinstance(value, str):
+            return value
+        if value.tzinfo is None or state.tz is None:
+            return field.to_representation(value)
+        value = value.astimezone(state.tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return represent
+
+
+def _file_representation(field):
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def represent(value, state):
+        if not use_url:
+            return value.name
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+        request = state.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+    return represent
+
+
+def _value_representation(field):
+    """represent(value, state) for a non-None value, mirroring field.to_representation()."""
+    if isinstance(field, fields.ReadOnlyField):
+        return lambda value, state: value
+    if isinstance(field, fields.BooleanField):
+        return lambda value, state: value if value is True or value is False else field.to_representation(value)
+    if isinstance(field, fields.CharField):
+        return lambda value, state: value if type(value) is str else str(value)
+    if isinstance(field, fields.IntegerField):
+        return lambda value, state: value if type(value) is int else int(value)
+    if isinstance(field, fields.DateTimeField):
+        represent = _datetime_representation(field)
+        if represent is not None:
+            return represent
+    if isinstance(field, fields.FileField):
+        represent = _file_representation(field)
+        return lambda value, state: represent(value, state) if value else None
+    return lambda value, state: field.to_representation(value)
+
+
+def _compile_field(field, model, prefix):
+    """(getter for model instances, getter for values() rows), each called as get(obj, state)."""
+    if isinstance(field, serializers.SerializerMethodField):
+        method_name = field.method_name
+        serializer_class = type(field.parent)
+
+        def get(obj, state):
+            return getattr(state.serializer(serializer_class), method_name)(obj)
+        return get, get
+
+    if isinstance(field, serializers.BaseSerializer):
+        if isinstance(field, serializers.ListSerializer):
+            raise TypeError(f"Nested many=True serializer {field.field_name!r} is not supported")
+        nested = compile_serializer(type(field), prefix + '__'.join(field.source_attrs) + '__')
+        from_instance, _ = _accessors(field, model, prefix)
+        pk_key = nested.prefix + nested.pk_name
+
+        def get_instance(obj, state):
+            value = from_instance(obj)
+            return None if value is None else nested.represent_instance(value, state)
+
+        def get_row(row, state):
+            return None if row.get(pk_key) is None else nested.represent_row(row, state)
+        return get_instance, get_row
+
+    from_instance, from_row = _accessors(field, model, prefix)
+    represent = _value_representation(field)
+
+    def get_instance(obj, state):
+        value = from_instance(obj)
+        return None if value is None else represent(value, state)
+
+    def get_row(row, state):
+        value = from_row(row)
+        return None if value is None else represent(value, state)
+    return get_instance, get_row
+
+
+class CompiledSerializer:
+    """Read-only renderer for one serializer class; `prefix` locates its keys in values() rows."""
+
+    def __init__(self, serializer_class, prefix=''):
+        self.serializer_class = serializer_class
+        self.prefix = prefix
+        model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+        self.pk_name = model._meta.pk.name if model is not None else 'id'
+        template = serializer_class()
+        compiled = [
+            (name, _compile_field(field, model, prefix))
+            for name, field in template.fields.items()
+            if not field.write_only
+        ]
+        self.instance_getters = tuple((name, getters[0]) for name, getters in compiled)
+        self.row_getters = tuple((name, getters[1]) for name, getters in compiled)
+
+    def represent(self, obj, state):
+        if isinstance(obj, Mapping):
+            return self.represent_row(obj, state)
+        return self.represent_instance(obj, state)
+
+    def represent_instance(self, obj, state):
+        return {name: get(obj, state) for name, get in self.instance_getters}
+
+    def represent_row(self, row, state):
+        return {name: get(row, state) for name, get in self.row_getters}
+
+    def to_representation(self, obj, context=None):
+        return self.represent(obj, _State(context))
+
+    def many(self, objects, context=None):
+        state = _State(context)
+        represent = self.represent
+        return [represent(obj, state) for obj in objects]
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class, prefix=''):
+    """The CompiledSerializer for `serializer_class`, built once per process."""
+    return CompiledSerializer(serializer_class, prefix)
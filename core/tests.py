@@ -0,0 +1,318 @@
+import cProfile
+import gzip
+import io
+import json
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import URLResolver, get_resolver, resolve, reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import Profile, User
+from accounts.serializers import ProfileSerializer, UserSerializer
+from . import middleware, renderers
+from .management.commands.startup_profile import parse_importtime
+from .middleware import CompressionMiddleware, choose_encoding
+from .paginator import EstimatedCountPaginator
+from .profiling import stats_to_collapsed
+from .renderers import FastJSONRenderer, dumps
+from .serializers import compile_serializer
+from .warmup import warm_up
+
+# Warm-up in a fresh interpreter, reporting which admin modules it imported
+WARMUP_CHILD = """
+import json, sys, django
+django.setup()
+from django.conf import settings
+settings.WARMUP_INDEXES = []
+from core.warmup import warm_up
+steps = warm_up()
+print(json.dumps({
+    'steps': steps,
+    'admin': sorted(name for name in sys.modules if name.endswith('.admin') or name == 'config.admin_urls'),
+}))
+"""
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_warm_up_leaves_the_admin_unloaded(self):
+        result = subprocess.run(
+            [sys.executable, '-c', WARMUP_CHILD], capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        self.assertGreater(report['steps']['urls'][0], 0)
+        self.assertEqual(report['steps']['serializers'][0], len(settings.WARMUP_SERIALIZERS))
+        self.assertNotIn('config.admin_urls', report['admin'])
+        self.assertNotIn('accounts.admin', report['admin'])
+
+    def test_warm_up_populates_the_included_urlconfs(self):
+        with self.settings(WARMUP_INDEXES=[]):
+            warm_up()
+        for pattern in get_resolver().url_patterns:
+            if isinstance(pattern, URLResolver) and not isinstance(pattern.urlconf_name, str):
+                self.assertTrue(pattern._populated)
+
+    def test_admin_urls_load_on_first_use(self):
+        self.assertEqual(reverse('admin:index'), '/admin/')
+        self.assertEqual(resolve('/admin/accounts/user/').url_name, 'accounts_user_changelist')
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:      2500 |       4000 | django.urls\n"
+            "some unrelated line\n"
+        )
+        self.assertEqual(parse_importtime(output), [('_io', 120, 120, 1), ('django.urls', 2500, 4000, 0)])
+
+
+class CompiledSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.request = RequestFactory().get('/', HTTP_HOST='localhost')
+
+    def test_user_output_matches_drf(self):
+        users = list(User.objects.all())
+        self.assertEqual(
+            dumps(compile_serializer(UserSerializer).many(users)),
+            dumps(UserSerializer(users, many=True).data),
+        )
+
+    def test_user_values_rows_match_drf(self):
+        rows = list(User.objects.values(*UserSerializer.Meta.fields))
+        self.assertEqual(
+            dumps(compile_serializer(UserSerializer).many(rows)),
+            dumps(UserSerializer(User.objects.all(), many=True).data),
+        )
+
+    def test_profile_output_matches_drf(self):
+        profiles = list(Profile.objects.select_related('user'))
+        context = {'request': self.request}
+        self.assertEqual(
+            dumps(compile_serializer(ProfileSerializer).many(profiles, context)),
+            dumps(ProfileSerializer(profiles, many=True, context=context).data),
+        )
+
+
+class BatchRequestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='olim@example.com', username='olim', password='x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def batch(self, *requests):
+        return self.client.post(reverse('batch'), {'requests': list(requests)}, format='json')
+
+    def test_sub_requests_run_in_order_with_shared_auth(self):
+        response = self.batch(
+            {'path': '/api/v1/auth/users/me/'},
+            {'path': '/api/v1/auth/profiles/olim/'},
+            {'path': '/api/v1/auth/profiles/yoq/'},
+            {'path': '/api/v1/nowhere/'},
+        )
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([r['status'] for r in responses], [200, 200, 404, 404])
+        self.assertEqual(responses[0]['body']['username'], 'olim')
+
+    def test_limits(self):
+        with self.settings(BATCH_MAX_REQUESTS=2):
+            self.assertEqual(self.batch(*[{'path': '/api/v1/auth/users/me/'}] * 3).status_code, 400)
+        self.assertEqual(self.batch({'method': 'DELETE', 'path': '/api/v1/posts/1/'}).status_code, 400)
+        self.assertEqual(self.batch({'path': '/admin/'}).status_code, 400)
+        nested = self.batch({'path': '/api/v1/batch/'})
+        self.assertEqual(nested.json()['responses'][0]['status'], 400)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.batch({'path': '/api/v1/posts/'}).status_code, 401)
+
+
+def _leaf():
+    return sum(range(2000))
+
+
+def _branch():
+    return [_leaf() for _ in range(20)]
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.profiling_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiling_dir)
+
+    def profiled_stats(self):
+        profiler = cProfile.Profile()
+        profiler.runcall(_branch)
+        return pstats.Stats(profiler)
+
+    def test_collapsed_stacks_follow_the_call_tree(self):
+        stacks = {}
+        for line in stats_to_collapsed(self.profiled_stats(), min_us=0):
+            stack, _, value = line.rpartition(' ')
+            stacks[tuple(frame.split(' (')[0] for frame in stack.split(';'))] = int(value)
+        self.assertIn(('_branch', '<listcomp>', '_leaf', 'built-in method builtins.sum'), stacks)
+        # The time inside sum() dominates the call tree
+        self.assertEqual(max(stacks, key=stacks.get)[-1], 'built-in method builtins.sum')
+
+    def profiled_get(self, **headers):
+        with self.settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0, PROFILING_TOKEN='sir',
+                           PROFILING_DIR=self.profiling_dir, PROFILING_MAX_SAMPLES=2):
+            return Client().get(reverse('post_list_create'), headers=headers)
+
+    def test_forced_requests_write_rotated_samples(self):
+        for _ in range(3):
+            self.assertEqual(self.profiled_get(x_profile='sir').status_code, 200)
+        directory = os.path.join(self.profiling_dir, 'post_list_create')
+        names = sorted(os.listdir(directory))
+        self.assertEqual(len([name for name in names if name.endswith('.prof')]), 2)
+        self.assertEqual(len([name for name in names if name.endswith('.folded')]), 2)
+        folded = next(name for name in names if name.endswith('.folded'))
+        with open(os.path.join(directory, folded), encoding='utf-8') as fh:
+            self.assertTrue(all(line.rpartition(' ')[2].isdigit() for line in fh.read().splitlines()))
+
+        out = io.StringIO()
+        with self.settings(PROFILING_DIR=self.profiling_dir):
+            call_command('profiling_top', view='post_list_create', limit=5, stdout=out)
+        self.assertIn('Aggregated 2 samples.', out.getvalue())
+
+    def test_wrong_token_and_disabled_middleware_do_not_profile(self):
+        self.assertEqual(self.profiled_get(x_profile='notogri').status_code, 200)
+        self.assertFalse(os.listdir(self.profiling_dir))
+        with self.settings(PROFILING_DIR=self.profiling_dir):
+            Client().get(reverse('post_list_create'), headers={'x_profile': 'sir'})
+        self.assertFalse(os.listdir(self.profiling_dir))
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        User.objects.bulk_create(
+            User(email=f'user{i}@example.com', username=f'user{i}') for i in range(3)
+        )
+
+    def paginator(self, queryset, estimate):
+        patcher = mock.patch.object(EstimatedCountPaginator, '_estimated_count', return_value=estimate)
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        return EstimatedCountPaginator(queryset, 2)
+
+    def test_large_unfiltered_tables_use_the_estimate(self):
+        paginator = self.paginator(User.objects.order_by('pk'), 250000)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 250000)
+        self.assertEqual(paginator.num_pages, 125000)
+
+    def test_small_or_filtered_querysets_are_counted(self):
+        self.assertEqual(self.paginator(User.objects.order_by('pk'), 99999).count, 3)
+        self.assertEqual(self.paginator(User.objects.filter(username='user1'), 250000).count, 1)
+        self.assertEqual(self.paginator(User.objects.order_by('pk'), None).count, 3)
+
+    def test_unsupported_backends_fall_back_to_count(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 2)
+        self.assertIsNone(paginator._estimated_count())
+        self.assertEqual(paginator.count, 3)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'created_at': datetime(2024, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+        'day': date(2024, 3, 1),
+        'price': Decimal('12.50'),
+        'title': gettext_lazy('Salom, dunyo — ўзбек'),
+        'separator': 'a\u2028b\u2029c',
+        'nested': [{1: None, 'ok': True}],
+    }
+
+    def test_backends_match_drf_output(self):
+        expected = JSONRenderer().render(self.data)
+        for backend in ('orjson', 'stdlib'):
+            if backend == 'orjson' and renderers.orjson is None:
+                continue
+            with self.subTest(backend=backend), self.settings(JSON_RENDERER_BACKEND=backend):
+                self.assertEqual(FastJSONRenderer().render(self.data), expected)
+
+    def test_indent_and_empty_bodies(self):
+        renderer = FastJSONRenderer()
+        self.assertEqual(renderer.render(None), b'')
+        indented = renderer.render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(indented, b'{\n  "a": 1\n}')
+
+    def test_backend_setting_is_validated(self):
+        with self.settings(JSON_RENDERER_BACKEND='simplejson'), self.assertRaises(ImproperlyConfigured):
+            dumps({})
+        with self.settings(JSON_RENDERER_BACKEND='orjson'), mock.patch.object(renderers, 'orjson', None), \
+                self.assertRaises(ImproperlyConfigured):
+            dumps({})
+        with self.settings(JSON_RENDERER_BACKEND='auto'), mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.get_backend(), 'stdlib')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = json.dumps([{'id': i, 'title': 'Sarlavha'} for i in range(20)]).encode()
+
+    def process(self, content=None, accept='gzip, deflate', status=200, **headers):
+        request = RequestFactory().get('/', headers={'accept-encoding': accept})
+        response = HttpResponse(self.body if content is None else content, status=status,
+                                content_type=headers.pop('content_type', 'application/json'))
+        for name, value in headers.items():
+            response[name.replace('_', '-')] = value
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_json_is_gzipped(self):
+        response = self.process(ETag='"v1"')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertEqual(self.process(ETag='W/"v1"')['ETag'], 'W/"v1"')
+
+    def test_small_or_excluded_responses_are_left_alone(self):
+        cases = {
+            'below threshold': self.process(self.body[:199]),
+            'partial content': self.process(status=206),
+            'not modified': self.process(status=304),
+            'html': self.process(content_type='text/html'),
+            'already encoded': self.process(Content_Encoding='identity'),
+            'incompressible': self.process(os.urandom(4096)),
+        }
+        for name, response in cases.items():
+            with self.subTest(name):
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+        self.assertFalse(self.process(self.body[:199]).has_header('Vary'))
+
+    def test_refused_encodings_get_an_uncompressed_vary_response(self):
+        for accept in ('gzip;q=0', 'identity', '', '*;q=0.5, gzip;q=0', 'gzip;q=bad'):
+            with self.subTest(accept=accept):
+                response = self.process(accept=accept)
+                self.assertEqual(response.content, self.body)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(self.process(accept='*;q=0.1')['Content-Encoding'], 'gzip')
+        self.assertEqual(self.process(accept='GZIP;q=0.5')['Content-Encoding'], 'gzip')
+
+    def test_choose_encoding_prefers_brotli_when_installed(self):
+        with mock.patch.object(middleware, 'brotli', object()):
+            self.assertEqual(choose_encoding('gzip, br'), 'br')
+            self.assertEqual(choose_encoding('gzip, br;q=0'), 'gzip')
+        with mock.patch.object(middleware, 'brotli', None):
+            self.assertEqual(choose_encoding('gzip, br'), 'gzip')
+            self.assertIsNone(choose_encoding('br'))
@@ -0,0 +1,146 @@
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .batch import dispatch, parse_batch, render_batch
+from .serializers import compile_serializer
+
+# <aa>/<sha256>.<ext> names written by accounts.storage.ContentHashStorage
+HASHED_NAME_RE = re.compile(r'(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}\.[a-z0-9]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _parse_range(header, size):
+    """Return (start, end) inclusive for a single byte range, None to ignore it, or False if unsatisfiable."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT.
+
+    Content-hashed names never change content, so they get a year-long
+    immutable Cache-Control. With MEDIA_SERVE_MODE set to 'x-sendfile' or
+    'x-accel-redirect' only headers are returned and the front-end server
+    streams the body; in 'python' mode single byte ranges are honoured.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    if HASHED_NAME_RE.search(path):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+    if request.headers.get('If-None-Match') in (etag, f'W/{etag}', '*'):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    elif mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + path
+    else:
+        byte_range = None
+        if 'Range' in request.headers:
+            byte_range = _parse_range(request.headers['Range'], stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            with open(full_path, 'rb') as fh:
+                fh.seek(start)
+                body = fh.read(end - start + 1)
+            response = HttpResponse(body, status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+            response['Content-Length'] = stat.st_size
+        response['Accept-Ranges'] = 'bytes'
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control
+    return response
+
+
+class CompiledListMixin:
+    """
+    ListAPIView mixin that renders GET pages through the compiled read path
+    of the view's serializer class (same output, no per-field dispatch).
+    """
+
+    def prepare_rows(self, rows):
+        """Hook to attach shared related objects to the fetched rows before rendering."""
+        return rows
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class())
+        context = self.get_serializer_context()
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.many(self.prepare_rows(page), context))
+        return Response(compiled.many(self.prepare_rows(list(queryset)), context))
+
+
+class BatchView(APIView):
+    """
+    POST {"requests": [{"method": "GET", "path": "/api/v1/posts/?page=2", "body": {...}}, ...]}
+
+    Runs the sub-requests in order, in-process and with the caller's
+    authentication, and answers {"responses": [{"status": ..., "body": ...}]}
+    in the same order. Count, methods and path prefix are limited by the
+    BATCH_* settings; each sub-request still goes through its view's own
+    permission and throttle checks.
+    """
+
+    def post(self, request):
+        entries = parse_batch(request.data)
+        results = [dispatch(request, *entry, batch_view=BatchView) for entry in entries]
+        return HttpResponse(render_batch(results), content_type='application/json')
@@ -0,0 +1,76 @@
+"""
+Start-up warm-up, run once per worker from config/wsgi.py and config/asgi.py
+when WARMUP_ON_STARTUP is set. It builds the per-process caches the first
+request would otherwise pay for: the URL resolvers' compiled patterns and
+reverse maps, the field maps of the hot read serializers and the in-process
+indexes listed in WARMUP_INDEXES.
+"""
+import logging
+import time
+from django.conf import settings
+from django.db import DatabaseError
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import import_string
+from .serializers import compile_serializer
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_resolver(resolver):
+    """
+    Compile every pattern regex and populate each resolver's reverse dict.
+    Resolvers wired with a dotted path (the admin) are left unloaded, and so
+    is any reverse dict that Django would build by importing one of them;
+    the first reverse() through it pays for that instead.
+    """
+    count, lazy = 0, False
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        count += 1
+        if isinstance(pattern, URLResolver):
+            if isinstance(pattern.urlconf_name, str):
+                lazy = True
+            else:
+                count += _warm_resolver(pattern)
+    if not lazy:
+        resolver.reverse_dict
+    return count
+
+
+def _warm_serializers(paths):
+    for path in paths:
+        serializer_class = import_string(path)
+        # Builds ModelSerializer field mappings and the model _meta caches
+        serializer_class().fields
+        compile_serializer(serializer_class)
+    return len(paths)
+
+
+def _warm_indexes(paths):
+    """
+    Load each index; returns the number of entries loaded. An index the
+    database cannot serve yet (not migrated, unreachable) is skipped and
+    loads on first use instead, so the worker still starts.
+    """
+    loaded = 0
+    for path in paths:
+        try:
+            loaded += import_string(path).load()
+        except DatabaseError:
+            logger.warning("Warming %s failed; it will load on first use", path, exc_info=True)
+    return loaded
+
+
+def warm_up():
+    """Run every warm-up step; returns {step: (items, seconds)}."""
+    timings = {}
+    for step, run in (
+        ('urls', lambda: _warm_resolver(get_resolver())),
+        ('serializers', lambda: _warm_serializers(settings.WARMUP_SERIALIZERS)),
+        ('indexes', lambda: _warm_indexes(settings.WARMUP_INDEXES)),
+    ):
+        start = time.perf_counter()
+        items = run()
+        timings[step] = (items, time.perf_counter() - start)
+    logger.debug("Warm-up finished: %s", timings)
+    return timings